@@ -21,10 +21,23 @@ from app.models.user import SQLModel  # noqa
 from app.models.thread import SQLModel as ThreadSQLModel  # noqa
 from app.models.post import SQLModel as PostSQLModel  # noqa
 from app.models.category import SQLModel as CategorySQLModel  # noqa
+from app.models.counter import SQLModel as CounterSQLModel  # noqa
+from app.models.outbox import SQLModel as OutboxSQLModel  # noqa
+from app.models.importer import SQLModel as ImporterSQLModel  # noqa
 from app.core.config import settings # noqa
 
 target_metadata = SQLModel.metadata
 
+# Columns managed only by migrations (e.g. generated tsvector columns) aren't declared on
+# the models so they're never loaded; keep autogenerate from proposing to drop them.
+MIGRATION_ONLY_COLUMNS = {("post", "search_vector"), ("thread", "search_vector")}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "column" and reflected and (object.table.name, name) in MIGRATION_ONLY_COLUMNS:
+        return False
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -49,7 +62,8 @@ def run_migrations_offline():
     """
     url = get_url()
     context.configure(
-        url=url, target_metadata=target_metadata, literal_binds=True, compare_type=True
+        url=url, target_metadata=target_metadata, literal_binds=True, compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -73,7 +87,8 @@ def run_migrations_online():
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata, compare_type=True
+            connection=connection, target_metadata=target_metadata, compare_type=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,31 @@
+"""Add import_checkpoint table
+
+Revision ID: 0b5e7a3c91d4
+Revises: f18b6d3e5a27
+Create Date: 2026-10-19 19:02:47.118350
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '0b5e7a3c91d4'
+down_revision = 'f18b6d3e5a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('import_checkpoint',
+    sa.Column('path', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('thread_id', sa.BigInteger(), nullable=False),
+    sa.Column('posts', sa.Integer(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('path')
+    )
+
+
+def downgrade():
+    op.drop_table('import_checkpoint')
@@ -0,0 +1,34 @@
+"""Backfill category children_count from thread rows
+
+Revision ID: 3b7c9d2e4f10
+Revises: 21f71a1ed14e
+Create Date: 2026-10-19 09:12:41.208113
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7c9d2e4f10'
+down_revision = '21f71a1ed14e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_thread used to bump thread.children_count instead of the category,
+    # so recompute the per-category thread totals once from the thread table.
+    op.execute(
+        """
+        UPDATE category
+        SET children_count = (
+            SELECT COUNT(*) FROM thread WHERE thread.category_id = category.id
+        )
+        WHERE category.level = 2
+        """
+    )
+
+
+def downgrade():
+    # Counts are derived data, nothing to undo.
+    pass
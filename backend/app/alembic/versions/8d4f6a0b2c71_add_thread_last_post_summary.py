@@ -0,0 +1,48 @@
+"""Add last post summary to thread
+
+Revision ID: 8d4f6a0b2c71
+Revises: 5e2a8f1c9b34
+Create Date: 2026-10-19 11:20:05.731842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4f6a0b2c71'
+down_revision = '5e2a8f1c9b34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('thread', sa.Column('last_post_id', sa.BigInteger(), nullable=True))
+    op.add_column('thread', sa.Column('last_post_user_id', sa.BigInteger(), nullable=True))
+    op.add_column('thread', sa.Column('last_post_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_thread_category_id_updated_at', 'thread', ['category_id', 'updated_at'], unique=False)
+    op.create_index('ix_post_thread_id_id', 'post', ['thread_id', 'id'], unique=False)
+
+    # Backfill from the newest post of each thread
+    op.execute(
+        """
+        UPDATE thread
+        SET last_post_id = last_post.id,
+            last_post_user_id = last_post.user_id,
+            last_post_at = last_post.created_at
+        FROM (
+            SELECT DISTINCT ON (thread_id) thread_id, id, user_id, created_at
+            FROM post
+            ORDER BY thread_id, id DESC
+        ) AS last_post
+        WHERE thread.id = last_post.thread_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_index('ix_post_thread_id_id', table_name='post')
+    op.drop_index('ix_thread_category_id_updated_at', table_name='thread')
+    op.drop_column('thread', 'last_post_at')
+    op.drop_column('thread', 'last_post_user_id')
+    op.drop_column('thread', 'last_post_id')
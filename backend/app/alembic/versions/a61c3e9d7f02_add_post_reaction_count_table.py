@@ -0,0 +1,55 @@
+"""Add post_reaction_count table
+
+Revision ID: a61c3e9d7f02
+Revises: 8d4f6a0b2c71
+Create Date: 2026-10-19 12:41:53.094417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a61c3e9d7f02'
+down_revision = '8d4f6a0b2c71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('post_reaction_count',
+    sa.Column('post_id', sa.BigInteger(), nullable=False),
+    sa.Column('reaction_type', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ),
+    sa.PrimaryKeyConstraint('post_id', 'reaction_type')
+    )
+
+    # Drop duplicate reactions before enforcing one reaction per (post, user, type)
+    op.execute(
+        """
+        DELETE FROM postreaction
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (PARTITION BY post_id, user_id, reaction_type ORDER BY id) AS rn
+                FROM postreaction
+            ) AS ranked
+            WHERE ranked.rn > 1
+        )
+        """
+    )
+    op.create_unique_constraint('uq_postreaction_post_user_type', 'postreaction', ['post_id', 'user_id', 'reaction_type'])
+
+    op.execute(
+        """
+        INSERT INTO post_reaction_count (post_id, reaction_type, count)
+        SELECT post_id, reaction_type, COUNT(*)
+        FROM postreaction
+        GROUP BY post_id, reaction_type
+        """
+    )
+
+
+def downgrade():
+    op.drop_constraint('uq_postreaction_post_user_type', 'postreaction', type_='unique')
+    op.drop_table('post_reaction_count')
@@ -0,0 +1,47 @@
+"""Add full text search over posts and thread titles
+
+Revision ID: c3e85b4d1a96
+Revises: a61c3e9d7f02
+Create Date: 2026-10-19 13:55:38.481270
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e85b4d1a96'
+down_revision = 'a61c3e9d7f02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Vietnamese has no stemmer in Postgres: use the simple parser and strip diacritics with
+    # unaccent, so "phỏng vấn" and "phong van" match each other.
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE TEXT SEARCH CONFIGURATION vietnamese_unaccent (COPY = simple)")
+    op.execute(
+        "ALTER TEXT SEARCH CONFIGURATION vietnamese_unaccent "
+        "ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple"
+    )
+
+    # The two-argument to_tsvector is immutable, so it can back a stored generated column.
+    # Note: adding the column rewrites the post table.
+    op.execute(
+        "ALTER TABLE post ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('vietnamese_unaccent'::regconfig, content)) STORED"
+    )
+    op.execute(
+        "ALTER TABLE thread ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('vietnamese_unaccent'::regconfig, title)) STORED"
+    )
+    op.execute("CREATE INDEX ix_post_search_vector ON post USING gin (search_vector)")
+    op.execute("CREATE INDEX ix_thread_search_vector ON thread USING gin (search_vector)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_thread_search_vector")
+    op.execute("DROP INDEX IF EXISTS ix_post_search_vector")
+    op.execute("ALTER TABLE thread DROP COLUMN IF EXISTS search_vector")
+    op.execute("ALTER TABLE post DROP COLUMN IF EXISTS search_vector")
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS vietnamese_unaccent")
@@ -0,0 +1,26 @@
+"""Add trigram indexes on thread title and tag name
+
+Revision ID: d72f19a6b8e3
+Revises: c3e85b4d1a96
+Create Date: 2026-10-19 14:37:12.660395
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd72f19a6b8e3'
+down_revision = 'c3e85b4d1a96'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_thread_title_trgm', 'thread', ['title'], unique=False, postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    op.create_index('ix_tag_name_trgm', 'tag', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_tag_name_trgm', table_name='tag')
+    op.drop_index('ix_thread_title_trgm', table_name='thread')
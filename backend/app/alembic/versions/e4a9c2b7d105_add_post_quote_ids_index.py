@@ -0,0 +1,23 @@
+"""Add GIN index on post quote_ids
+
+Revision ID: e4a9c2b7d105
+Revises: d72f19a6b8e3
+Create Date: 2026-10-19 15:02:41.218734
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a9c2b7d105'
+down_revision = 'd72f19a6b8e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_post_quote_ids', 'post', ['quote_ids'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_post_quote_ids', table_name='post')
@@ -0,0 +1,31 @@
+"""Add graph_outbox table
+
+Revision ID: f18b6d3e5a27
+Revises: e4a9c2b7d105
+Create Date: 2026-10-19 18:21:05.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f18b6d3e5a27'
+down_revision = 'e4a9c2b7d105'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('graph_outbox',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('thread_id', sa.BigInteger(), nullable=False),
+    sa.Column('tag_names', postgresql.ARRAY(sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('graph_outbox')
@@ -1,19 +1,22 @@
+import time
 from collections.abc import Generator
 from typing import Annotated, Tuple
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer, HTTPBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
 from sqlmodel import Session, select
-from neo4j import Session as Neo4jSession
 from influxdb_client import InfluxDBClient
 
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
-from app.core.neo4j import neo4j_conn
+from app.core.dataloader import Loaders
+from app.core.db import engine, read_router
+from app.data_access import user as user_da
 from app.core.influxdb import influxdb_conn
 from app.models.user import TokenPayload, User
 
@@ -22,13 +25,57 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 
 
-def get_db() -> Generator[Session, None, None]:
+# Set after a committed write; while it hasn't expired the client's reads stay on the primary
+PRIMARY_UNTIL_COOKIE = "primary_until"
+
+
+def get_db(response: Response) -> Generator[Session, None, None]:
     with Session(engine) as session:
+        if read_router.replicas:
+            _stick_to_primary_after_write(session, response)
         yield session
 
-# Dependency to get a Neo4j session
-async def get_neo4j_db():
-    async with neo4j_conn.get_session() as session:
+
+def _stick_to_primary_after_write(session: Session, response: Response) -> None:
+    @event.listens_for(session, "after_flush")
+    def _mark_flush(session, flush_context):
+        session.info["has_writes"] = True
+
+    @event.listens_for(session, "do_orm_execute")
+    def _mark_dml(orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            orm_execute_state.session.info["has_writes"] = True
+
+    @event.listens_for(session, "after_commit")
+    def _set_primary_cookie(session):
+        if not session.info.pop("has_writes", False):
+            return
+        primary_until = int(time.time()) + settings.READ_YOUR_WRITES_SECONDS
+        response.set_cookie(
+            PRIMARY_UNTIL_COOKIE,
+            str(primary_until),
+            max_age=settings.READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+        )
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """Session for read-only handlers, served by a replica unless the client just wrote."""
+    primary_until = request.cookies.get(PRIMARY_UNTIL_COOKIE, "")
+    if primary_until.isdigit() and int(primary_until) > time.time():
+        bind = engine
+    else:
+        bind = read_router.get_engine()
+    session = Session(bind)
+    if bind is not engine:
+        try:
+            # Check out the connection up front so a dead replica falls back before the handler runs
+            session.connection()
+        except OperationalError:
+            session.close()
+            read_router.mark_down(bind)
+            session = Session(engine)
+    with session:
         yield session
 
 # Dependency to get InfluxDB client and org context
@@ -37,24 +84,47 @@ async def get_influxdb() -> Generator[Tuple[InfluxDBClient, str], None, None]:
         yield client, org
 
 SessionDep = Annotated[Session, Depends(get_db)]
-Neo4jSessionDep = Annotated[Neo4jSession, Depends(get_neo4j_db)]
+ReadSessionDep = Annotated[Session, Depends(get_read_db)]
 InfluxDBDep = Annotated[Tuple[InfluxDBClient, str], Depends(get_influxdb)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 oauth2_scheme = OAuth2PasswordBearer("token")
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+def get_loaders(session: SessionDep) -> Loaders:
+    return Loaders(session.get_bind())
+
+
+def get_read_loaders(session: ReadSessionDep) -> Loaders:
+    return Loaders(session.get_bind())
+
+
+# Dependencies are cached per request, so these use the engine (primary or replica) of the handler's session
+LoadersDep = Annotated[Loaders, Depends(get_loaders)]
+ReadLoadersDep = Annotated[Loaders, Depends(get_read_loaders)]
+
+
+async def get_current_user(session: SessionDep, loaders: LoadersDep, token: TokenDep) -> User:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
         token_data = TokenPayload(**payload)
-    except (InvalidTokenError, ValidationError):
+        user_id = int(token_data.sub)
+    except (InvalidTokenError, ValidationError, TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
+    # Authorization normally costs no Postgres query: the principal is cached for a few minutes
+    user = await user_da.get_cached_principal(session, user_id)
+    if user is None:
+        user = await loaders.users.load(user_id)
+        if user is not None:
+            await user_da.cache_principal(user)
+            # Loaded detached, attach it like a cached principal so handlers can update it
+            session.add(user)
+    else:
+        loaders.users.prime(user_id, user)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if user.is_banned:
@@ -8,6 +8,7 @@ from app.api.routes import (
     thread,
     tag,
     post,
+    search,
     private,
     neo4j_test,
     influxdb_test,
@@ -21,6 +22,7 @@ api_router.include_router(utils.router)
 api_router.include_router(thread.router)
 api_router.include_router(tag.router)
 api_router.include_router(post.router)  
+api_router.include_router(search.router)
 
 if settings.ENVIRONMENT == "local":
     api_router.include_router(private.router)
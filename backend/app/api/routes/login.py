@@ -2,6 +2,7 @@ from datetime import timedelta
 from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
@@ -9,7 +10,8 @@ from app import crud
 from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser
 from app.core import security
 from app.core.config import settings
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
+from app.data_access import user as user_da
 from app.models.user import Message, NewPassword, Token, UserPublic
 from app.utils import (
     generate_password_reset_token,
@@ -22,13 +24,13 @@ router = APIRouter(tags=["login"])
 
 
 @router.post("/login/access-token")
-def login_access_token(
+async def login_access_token(
     session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
 ) -> Token:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = crud.authenticate(
+    user = await crud.authenticate(
         session=session, email=form_data.username, password=form_data.password
     )
     if not user:
@@ -42,74 +44,71 @@ def login_access_token(
         )
     )
 
-# @router.post("/password-recovery/{email}")
-# def recover_password(email: str, session: SessionDep) -> Message:
-#     """
-#     Password Recovery
-#     """
-#     user = crud.get_user_by_email(session=session, email=email)
-#
-#     if not user:
-#         raise HTTPException(
-#             status_code=404,
-#             detail="The user with this email does not exist in the system.",
-#         )
-#     password_reset_token = generate_password_reset_token(email=email)
-#     email_data = generate_reset_password_email(
-#         email_to=user.email, email=email, token=password_reset_token
-#     )
-#     send_email(
-#         email_to=user.email,
-#         subject=email_data.subject,
-#         html_content=email_data.html_content,
-#     )
-#     return Message(message="Password recovery email sent")
-#
+@router.post("/password-recovery/{email}")
+def recover_password(email: str, session: SessionDep) -> Message:
+    """
+    Password Recovery. Imported users have no usable password and set their first one this way.
+    """
+    user = crud.get_user_by_email(session=session, email=email)
+
+    # Same answer whether or not the account exists, so emails can't be probed
+    if user and not user.is_banned:
+        password_reset_token = generate_password_reset_token(email=email)
+        email_data = generate_reset_password_email(
+            email_to=user.email, email=email, token=password_reset_token
+        )
+        send_email(
+            email_to=user.email,
+            subject=email_data.subject,
+            html_content=email_data.html_content,
+        )
+    return Message(message="If the account exists, a password recovery email was sent")
+
+
+@router.post("/reset-password/")
+async def reset_password(session: SessionDep, body: NewPassword) -> Message:
+    """
+    Reset password
+    """
+    email = verify_password_reset_token(token=body.token)
+    if not email:
+        raise HTTPException(status_code=400, detail="Invalid token")
+    user = await run_in_threadpool(crud.get_user_by_email, session=session, email=email)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="The user with this email does not exist in the system.",
+        )
+    elif user.is_banned:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    user.hashed_password = await get_password_hash_async(body.new_password)
+    session.add(user)
+    await run_in_threadpool(session.commit)
+    await user_da.invalidate_user(user.id)
+    return Message(message="Password updated successfully")
+
 
-# @router.post("/reset-password/")
-# def reset_password(session: SessionDep, body: NewPassword) -> Message:
-#     """
-#     Reset password
-#     """
-#     email = verify_password_reset_token(token=body.token)
-#     if not email:
-#         raise HTTPException(status_code=400, detail="Invalid token")
-#     user = crud.get_user_by_email(session=session, email=email)
-#     if not user:
-#         raise HTTPException(
-#             status_code=404,
-#             detail="The user with this email does not exist in the system.",
-#         )
-#     elif user.is_banned:
-#         raise HTTPException(status_code=400, detail="Inactive user")
-#     hashed_password = get_password_hash(password=body.new_password)
-#     user.hashed_password = hashed_password
-#     session.add(user)
-#     session.commit()
-#     return Message(message="Password updated successfully")
+@router.post(
+    "/password-recovery-html-content/{email}",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_class=HTMLResponse,
+)
+def recover_password_html_content(email: str, session: SessionDep) -> Any:
+    """
+    HTML Content for Password Recovery
+    """
+    user = crud.get_user_by_email(session=session, email=email)
 
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="The user with this username does not exist in the system.",
+        )
+    password_reset_token = generate_password_reset_token(email=email)
+    email_data = generate_reset_password_email(
+        email_to=user.email, email=email, token=password_reset_token
+    )
 
-# @router.post(
-#     "/password-recovery-html-content/{email}",
-#     dependencies=[Depends(get_current_active_superuser)],
-#     response_class=HTMLResponse,
-# )
-# def recover_password_html_content(email: str, session: SessionDep) -> Any:
-#     """
-#     HTML Content for Password Recovery
-#     """
-#     user = crud.get_user_by_email(session=session, email=email)
-#
-#     if not user:
-#         raise HTTPException(
-#             status_code=404,
-#             detail="The user with this username does not exist in the system.",
-#         )
-#     password_reset_token = generate_password_reset_token(email=email)
-#     email_data = generate_reset_password_email(
-#         email_to=user.email, email=email, token=password_reset_token
-#     )
-#
-#     return HTMLResponse(
-#         content=email_data.html_content, headers={"subject:": email_data.subject}
-#     )
+    return HTMLResponse(
+        content=email_data.html_content, headers={"subject:": email_data.subject}
+    )
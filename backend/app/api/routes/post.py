@@ -3,15 +3,17 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session, select
 
-from app.api.deps import SessionDep
+from app.api.deps import ReadSessionDep
+from app.data_access import post as post_da
 from app.models.post import Post, PostResponse
 
 router = APIRouter(prefix="/post", tags=["post"])
 
 @router.get("/", response_model=List[PostResponse])
 def get_posts_by_ids(
-    session: SessionDep,
-    post_ids: List[int] = Query(..., description="List of post IDs to fetch")
+    session: ReadSessionDep,
+    post_ids: List[int] = Query(..., description="List of post IDs to fetch"),
+    include_quotes: bool = Query(default=False, description="Embed excerpts of the quoted posts")
 ):
     """
     Retrieve multiple posts by their IDs.
@@ -25,4 +27,20 @@ def get_posts_by_ids(
     if not db_posts:
         return []
 
-    return db_posts 
+    if include_quotes:
+        return post_da.with_quotes(session, db_posts)
+    return db_posts
+
+
+@router.get("/{post_id}/quoted_by", response_model=List[PostResponse])
+def get_quoted_by(
+    session: ReadSessionDep,
+    post_id: int,
+    before_id: int | None = Query(default=None, description="Return posts older than this id, for paging"),
+    limit: int = Query(default=20, ge=1, le=100),
+):
+    """
+    Retrieve the posts quoting a post, newest first.
+    """
+    return post_da.get_quoting_posts(session, post_id, before_id=before_id, limit=limit)
+
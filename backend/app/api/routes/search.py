@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import List, Literal
+
+from fastapi import APIRouter, HTTPException, Query
+from sqlmodel import SQLModel
+
+from app.api.deps import ReadSessionDep
+from app.data_access import search
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+class SearchHit(SQLModel):
+    post_id: int | None
+    thread_id: int
+    thread_title: str
+    user_id: int
+    created_at: datetime
+    rank: float
+    headline: str
+
+
+class SearchPage(SQLModel):
+    hits: List[SearchHit]
+    next_cursor: str | None = None
+
+
+@router.get("/", response_model=SearchPage)
+def search_content(
+    session: ReadSessionDep,
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms, websearch syntax"),
+    scope: Literal["posts", "threads"] = "posts",
+    category_id: int | None = None,
+    tag_id: int | None = None,
+    cursor: str | None = Query(default=None, description="next_cursor of the previous page"),
+    limit: int = Query(default=20, ge=1, le=100),
+):
+    """
+    Full text search over post content or thread titles, ranked by relevance.
+    Matches are highlighted with <mark> in `headline`.
+    """
+    search_fn = search.search_posts if scope == "posts" else search.search_threads
+    try:
+        hits = search_fn(session, q, category_id=category_id, tag_id=tag_id, cursor=cursor, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    next_cursor = None
+    if len(hits) == limit:
+        last = hits[-1]
+        next_cursor = search.encode_cursor(last["rank"], last["post_id"] if scope == "posts" else last["thread_id"])
+    return SearchPage(hits=hits, next_cursor=next_cursor)
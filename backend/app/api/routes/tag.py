@@ -1,20 +1,22 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, update
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session, select
 from app.models.thread import Tag, ThreadTag
-from app.models.thread import Thread
-from app.api.deps import CurrentUser, SessionDep, Neo4jSessionDep
+from app.api.deps import CurrentUser, LoadersDep, ReadSessionDep, SessionDep
 from typing import List
 from sqlmodel import SQLModel
-from app.data_access import neo4j
+from app.data_access import outbox, similar
+from app.data_access.tag import THREAD_TAGS_KEY_PREFIX, TAGS_CACHE_TTL, get_tags_for_thread as get_thread_tags
 from sqlalchemy.dialects.postgresql import insert
+from app.core.config import settings
 from app.core.redis import redis_conn
+from app.tasks.similar import recompute_similar_threads
 
 router = APIRouter(prefix="/tag", tags=["tag"])
 
 # Constants for caching
 TAGS_CACHE_KEY = "all_tags"
-THREAD_TAGS_KEY_PREFIX = "thread_tags:"
-TAGS_CACHE_TTL = 6 * 60 * 60  # 6 hours in seconds
 
 class CreateTag(SQLModel):
     name: str
@@ -51,21 +53,34 @@ async def get_tags(session: SessionDep):
     
     return tags
 
+def _insert_thread_tags(session: Session, thread_id: int, insert_data: list[dict], tag_names: dict[int, str]) -> list[int]:
+    """Insert the threadtag rows, returns the ids of the tags the thread didn't have yet."""
+    q = (
+        insert(ThreadTag).values(insert_data)
+        .on_conflict_do_nothing(index_elements=["tag_id", "thread_id"])
+        .returning(ThreadTag.tag_id)
+    )
+    new_tag_ids = session.execute(q).scalars().all()
+    # Neo4j is updated from the outbox row, committed atomically with the threadtag rows
+    if new_tag_ids:
+        outbox.record_thread_tags(session, thread_id, [tag_names[tag_id] for tag_id in new_tag_ids])
+    session.commit()
+    return new_tag_ids
+
 @router.post("/thread", response_model=dict)
-async def add_tags_to_thread(tag_ids: list[int], thread_id: int, session: SessionDep, neo4j_session: Neo4jSessionDep, current_user: CurrentUser):
+async def add_tags_to_thread(tag_ids: list[int], thread_id: int, session: SessionDep, loaders: LoadersDep, current_user: CurrentUser):
     if current_user.level != 0:
         raise HTTPException(status_code=403, detail="Only admin can add thread to tag")
     
-    thread = session.exec(select(Thread).where(Thread.id == thread_id)).first()
+    # The thread and the tags are looked up concurrently, one query each
+    thread, tags = await asyncio.gather(loaders.threads.load(thread_id), loaders.tags.load_many(set(tag_ids)))
     
     if thread is None:
         raise HTTPException(status_code=404, detail="Thread not found")
     # Check if all tags exist
-    tags = session.exec(select(Tag).where(Tag.id.in_(tag_ids))).all()
-    tag_names = [tag.name for tag in tags] # Get names for Neo4j
-    
-    if len(tags) != len(set(tag_ids)): # Check against unique input IDs
+    if any(tag is None for tag in tags):
         raise HTTPException(status_code=404, detail="One or more tags not found")   
+    tag_names = {tag.id: tag.name for tag in tags} # Get names for the graph outbox
     
     
     insert_data = []
@@ -78,22 +93,24 @@ async def add_tags_to_thread(tag_ids: list[int], thread_id: int, session: Sessio
         insert_data.append(data)
         
     if insert_data:
-        q = insert(ThreadTag).values(insert_data).on_conflict_do_nothing(index_elements=["tag_id", "thread_id"])
-        session.execute(q) # Use execute for insert statements
-        # Add tag to neo4j
-        session.commit()
-        neo4j.add_tags_to_thread(thread_id, tag_names, neo4j_session=neo4j_session)
+        new_tag_ids = await run_in_threadpool(_insert_thread_tags, session, thread_id, insert_data, tag_names)
         
         # Invalidate thread tags cache
         thread_tags_key = f"{THREAD_TAGS_KEY_PREFIX}{thread_id}"
         await redis_conn.remove(thread_tags_key)
+        # Only the lists of threads sharing one of the new tags can change, they are rebuilt in the background
+        if new_tag_ids:
+            similar.tag_index.add_thread_tags(thread_id, new_tag_ids)
+            # Neo4j only has the new edges once the outbox is drained, which then triggers the recompute
+            if settings.SIMILAR_THREADS_BACKEND != "neo4j":
+                recompute_similar_threads.delay(thread_id, new_tag_ids)
     else:
         return {"message": "No new tags to add or invalid input"}
 
     return {"message": "Tags added to thread"}
 
 @router.get("/thread/{thread_id}", response_model=List[Tag])
-async def get_tags_for_thread(thread_id: int, session: SessionDep):
+async def get_tags_for_thread(thread_id: int, session: ReadSessionDep):
     """
     Retrieve all tags associated with a specific thread.
     """
@@ -105,16 +122,10 @@ async def get_tags_for_thread(thread_id: int, session: SessionDep):
         return [Tag(**tag_data) for tag_data in cached_tags]
         
     # If not in cache, get from database
-    tag_ids_stmt = select(ThreadTag.tag_id).where(ThreadTag.thread_id == thread_id)
-    tag_ids = session.exec(tag_ids_stmt).all()
-
-    if not tag_ids:
+    tags = get_thread_tags(session, thread_id)
+    if not tags:
         return [] # No tags associated with this thread
 
-    # Fetch the actual Tag objects based on the IDs
-    tags_stmt = select(Tag).where(Tag.id.in_(tag_ids))
-    tags = session.exec(tags_stmt).all()
-    
     # Cache the result for 6 hours
     await redis_conn.cache_list(cache_key, tags, TAGS_CACHE_TTL)
 
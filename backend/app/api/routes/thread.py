@@ -1,24 +1,39 @@
+import asyncio
+import logging
+import time
 from typing import Optional, List, Dict
-from fastapi import APIRouter, HTTPException
-from app.api.deps import CurrentUser, SessionDep
-from app.models.post import Post, PostCreate, PostResponse, PostReaction
-from sqlmodel import SQLModel, Field, select, update        
-from app.models.thread import ThreadCreate, Thread, ThreadView
+import anyio
+from fastapi import APIRouter, HTTPException, Query, Response
+from app.api.deps import CurrentUser, ReadLoadersDep, ReadSessionDep, SessionDep
+from app.models.post import Post, PostCreate, PostResponse, PostReaction, PostReactionCount
+from sqlmodel import Session, SQLModel, Field, delete, select
+from app.models.thread import ThreadCreate, ThreadResponse, Tag, Thread, ThreadTag, ThreadView
+from app.models.user import Message, UserPublic
 from app.models.category import Category
-from app.data_access import neo4j
-from collections import defaultdict 
-from datetime import datetime
-from app.api.deps import Neo4jSessionDep
+from app.models.outbox import GraphOutbox
+from app.data_access import counter, reaction, search, similar
+from app.data_access import post as post_da
+from app.data_access import tag as tag_da
+from app.data_access import thread as thread_da
+from app.core.cache import LocalTTLCache
+from app.core.dataloader import Loaders
 from app.core.redis import redis_conn
+from redis.exceptions import RedisError
+from neo4j.exceptions import DriverError, Neo4jError
 from app.tasks.thread import record_thread_view
 from app.worker import example_task
 
 from sqlalchemy import text
 router = APIRouter(prefix="/thread", tags=["thread"])
+logger = logging.getLogger(__name__)
 
 # Constants for caching
 HOMEPAGE_CACHE_KEY = "homepage_data"
 HOMEPAGE_CACHE_TTL = 30 * 60  # 30 minutes in seconds
+# Short popular prefixes are requested on every keystroke, keep them in process
+SUGGEST_CACHE = LocalTTLCache(maxsize=2048, ttl=60)
+# pg_trgm extracts no usable trigram from a shorter '%q%' pattern, which then scans the whole table
+SUGGEST_MIN_LENGTH = 3
 
 class ThreadWithPosts(SQLModel):
     id: int
@@ -36,13 +51,10 @@ class CategoryWithChildren(SQLModel):
     children_count: int
     children: List["CategoryWithChildren"] = Field(default_factory=list)
 
-class ThreadResponse(SQLModel):
-    id: int
-    title: str
-    user_id: int
-    category_id: int | None   
-    children_count: int
-    updated_at: datetime
+def to_thread_response(thread: Thread, pending_delta: int = 0) -> ThreadResponse:
+    # children_count lags behind by whatever is still queued in counterdelta. updated_at and
+    # last_post_* are only moved by the fold task, so they stay stale until it runs.
+    return ThreadResponse.model_validate(thread, update={"children_count": thread.children_count + pending_delta})
 
 
 @router.post("/{thread_id}/post", response_model=int)
@@ -54,45 +66,29 @@ def create_post(session: SessionDep, thread_id: int, post: PostCreate, current_u
         raise HTTPException(status_code=404, detail="Thread not found")
     db_post = Post(**post.model_dump(), thread_id=db_thread.id, user_id=current_user.id)
     session.add(db_post)
-    # atomic increment post count
-    q = update(Thread).where(Thread.id == thread_id).values(children_count=Thread.children_count + 1, updated_at=datetime.now())
-    session.exec(q)
+    # Append a counter delta instead of updating the thread row, so concurrent posters don't queue on its lock
+    counter.record_delta(session, counter.THREAD, thread_id)
     session.commit()
     session.refresh(db_thread)
-    return db_thread.children_count
+    return db_thread.children_count + counter.get_pending_delta(session, counter.THREAD, thread_id)
 
 @router.post("/", response_model=ThreadWithPosts)
 def create_thread(session: SessionDep, thread: ThreadCreate, current_user: CurrentUser):
-    category = session.exec(select(Category).where(Category.id == thread.category_id)).first()
-    if category is None:
-        raise HTTPException(status_code=404, detail="Category not found")   
-    if category.level != 2:
+    # Category check, thread insert, first post and category counter bump share one commit
+    created = thread_da.create_thread(session, thread, current_user.id)
+    if created is None:
+        category = session.exec(select(Category).where(Category.id == thread.category_id)).first()
+        if category is None:
+            raise HTTPException(status_code=404, detail="Category not found")   
         raise HTTPException(status_code=400, detail="Only create thread in second level category")
-    
-    db_thread = Thread(**thread.model_dump(), user_id=current_user.id, children_count=1)
-    session.add(db_thread)  
-    session.commit()
-
-    update_q = update(Thread).where(Thread.id == thread.category_id).values(children_count=Thread.children_count + 1)
-    session.exec(update_q)
-    session.commit()
+    db_thread, first_post = created
 
-    if thread.content is not None:
-        first_post = Post(thread_id=db_thread.id, user_id=current_user.id, content=thread.content)
-        session.add(first_post)
-        session.commit()
-        session.refresh(db_thread)  
-        session.refresh(first_post)
-        children = [first_post]
-    else:
-        children = []
-    
     return ThreadWithPosts(
         id=db_thread.id,
         title=db_thread.title,
         user_id=db_thread.user_id,
         category_id=db_thread.category_id,
-        posts=children,
+        posts=[first_post] if first_post is not None else [],
     )
 
 # TODO: Cache this response later once we set up Redis.
@@ -147,31 +143,66 @@ async def get_homepage(session: SessionDep):
     return result
 
 
+class ThreadSuggestion(SQLModel):
+    id: int
+    title: str
+
+class TagSuggestion(SQLModel):
+    id: int
+    name: str
+
+class SuggestResponse(SQLModel):
+    threads: List[ThreadSuggestion]
+    tags: List[TagSuggestion]
+
+
+@router.get("/suggest", response_model=SuggestResponse)
+def suggest(session: ReadSessionDep, q: str = Query(..., min_length=SUGGEST_MIN_LENGTH, max_length=100), limit: int = Query(default=8, ge=1, le=20)):
+    """
+    Type-ahead for thread titles and tag names.
+    """
+    key = (q.strip().lower(), limit)
+    if len(key[0]) < SUGGEST_MIN_LENGTH:
+        return SuggestResponse(threads=[], tags=[])
+    cached = SUGGEST_CACHE.get(key)
+    if cached is not None:
+        return cached
+    result = SuggestResponse(
+        threads=[ThreadSuggestion(id=id, title=title) for id, title in search.suggest_threads(session, key[0], limit)],
+        tags=[TagSuggestion(id=id, name=name) for id, name in search.suggest_tags(session, key[0], limit)],
+    )
+    SUGGEST_CACHE.set(key, result)
+    return result
+
+
+@router.get("/similar_threads/batch", response_model=Dict[int, List[ThreadResponse]])
+async def get_similar_threads_batch(
+    session: ReadSessionDep,
+    thread_ids: List[int] = Query(..., max_length=50, description="Thread IDs to find similar threads for"),
+):
+    """
+    Similar threads of many threads at once, for listing pages. The precomputed lists are read
+    with one MGET and every candidate thread is hydrated with one query.
+    """
+    bind = session.get_bind()
+    thread_ids = list(dict.fromkeys(thread_ids))
+    similar_threads = await similar.get_cached_similar_threads_many(thread_ids)
+    missing = [thread_id for thread_id, rows in similar_threads.items() if rows is None]
+    if missing:
+        similar_threads.update(await _compute_similar_ids(bind, missing))
+    return await _in_session(bind, thread_da.rank_similar_threads_many, similar_threads, 5)
+
+
 @router.get("/similar_threads", response_model=List[ThreadResponse])
-def get_similar_threads(session: SessionDep, thread_id: int, neo4j_session: Neo4jSessionDep):
-    db_thread = session.exec(select(Thread).where(Thread.id == thread_id)).first()
+async def get_similar_threads(session: ReadSessionDep, thread_id: int):
+    bind = session.get_bind()
+    db_thread = await _in_session(bind, _load_thread, thread_id)
     if db_thread is None:
         raise HTTPException(status_code=404, detail="Thread not found")
-    # List[thread_id, related_tags: int]
-    similar_threads = neo4j.get_similar_threads(neo4j_session, db_thread.id, limit=5)
-    scores_mapping = defaultdict(list)
-    scores = [] 
-    for similar_thread in similar_threads:
-        thread_id = similar_thread["threadId"]
-        related_tags = similar_thread["sharedTags"]
-        scores_mapping[related_tags].append(thread_id)
-        scores.append(related_tags)
-    scores.sort(reverse=True)   
-    # We query based on related_tags descending order until we get 5. Also query based on updated_at descending order.
-    result = []
-    for score in scores:
-        thread_ids = scores_mapping[score]
-        query = select(Thread).where(Thread.id.in_(thread_ids)).order_by(Thread.updated_at.desc())
-        similar_threads = session.exec(query).all() 
-        result.extend(similar_threads)
-        if len(result) >= 5:
-            break
-    return result[:5]
+    # List[thread_id, related_tags: int], precomputed and refreshed when tags change
+    similar_threads = await _load_similar_ids(bind, thread_id)
+    # Ordered by related_tags descending, then by updated_at descending
+    return await _in_session(bind, thread_da.rank_similar_threads, similar_threads, 5)
 
 
 @router.get("/trending", response_model=List[ThreadResponse])
@@ -205,34 +236,248 @@ class PaginatedThread(SQLModel):
 
 
 @router.get("/{thread_id}/get_third_level_thread", response_model=PaginatedThread)
-def get_thread_by_category(session: SessionDep, category_id: int, limit: int = 10, offset: int = 0):
+def get_thread_by_category(session: ReadSessionDep, category_id: int, limit: int = 10, offset: int = 0):
+    """
+    Threads of a second level category, most recently active first.
+
+    children_count and total include the deltas not folded yet. A new post only moves its
+    thread's updated_at and last_post_* when fold_counter_deltas runs (every 5 seconds), so
+    until then the thread keeps its old position and last post in this listing.
+    """
     category = session.exec(select(Category).where(Category.id == category_id)).first()   
     if category is None:
         raise HTTPException(status_code=404, detail="Parent thread not found")
     if category.level != 2:
         raise HTTPException(status_code=403, detail="Category is not a third level category")
-    threads = session.exec(select(Thread).where(Thread.category_id == category.id).order_by(Thread.updated_at.desc()).offset(offset).limit(limit)).all()
-    return PaginatedThread(threads=threads, total=len(threads))
+    query = (
+        select(Thread, counter.pending_delta_column(counter.THREAD, Thread.id))
+        .where(Thread.category_id == category.id)
+        .order_by(Thread.updated_at.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    threads = [to_thread_response(thread, pending) for thread, pending in session.exec(query).all()]
+    # children_count is maintained with every thread insert/delete, so no COUNT(*) is needed here
+    total = category.children_count + counter.get_pending_delta(session, counter.CATEGORY, category.id)
+    return PaginatedThread(threads=threads, total=total)
 
 @router.get("/{thread_id}", response_model=ThreadResponse)
-def get_thread(session: SessionDep, thread_id: int):
+def get_thread(session: ReadSessionDep, thread_id: int):
+    """
+    A thread with its live children_count. updated_at and last_post_* trail new posts until
+    the next fold_counter_deltas run (every 5 seconds).
+    """
+    row = session.exec(select(Thread, counter.pending_delta_column(counter.THREAD, Thread.id)).where(Thread.id == thread_id)).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    db_thread, pending = row
+    return to_thread_response(db_thread, pending)
+
+class ThreadPage(SQLModel):
+    thread: ThreadResponse
+    posts: List[PostResponse]
+    authors: Dict[int, UserPublic]
+    tags: List[Tag]
+    reactions: Dict[int, Dict[int, int]]
+    similar_threads: List[ThreadResponse]
+
+
+async def _timed(timings: dict[str, float], name: str, awaitable):
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[name] = (time.perf_counter() - start) * 1000
+
+
+def _in_session(bind, fn, *args):
+    # A Session isn't safe to share across threads, so every concurrent part opens its own on the same engine
+    def run():
+        with Session(bind) as session:
+            return fn(session, *args)
+    return asyncio.to_thread(run)
+
+
+def _load_thread(session: Session, thread_id: int) -> ThreadResponse | None:
+    row = session.exec(select(Thread, counter.pending_delta_column(counter.THREAD, Thread.id)).where(Thread.id == thread_id)).first()
+    return to_thread_response(*row) if row is not None else None
+
+
+def _load_posts(session: Session, thread_id: int, limit: int, offset: int) -> list[PostResponse]:
+    db_posts = session.exec(select(Post).where(Post.thread_id == thread_id).order_by(Post.id.asc()).offset(offset).limit(limit)).all()
+    return post_da.with_quotes(session, db_posts)
+
+
+async def _load_authors(loaders: Loaders, user_ids: list[int]) -> Dict[int, UserPublic]:
+    users = await loaders.users.load_many(user_ids)
+    return {user.id: UserPublic.model_validate(user) for user in users if user is not None}
+
+
+async def _load_tags(bind, thread_id: int) -> list[Tag]:
+    cache_key = f"{tag_da.THREAD_TAGS_KEY_PREFIX}{thread_id}"
+    cached_tags = await redis_conn.get_cached_object(cache_key)
+    if cached_tags:
+        return [Tag(**tag_data) for tag_data in cached_tags]
+    tags = await _in_session(bind, tag_da.get_tags_for_thread, thread_id)
+    if tags:
+        await redis_conn.cache_list(cache_key, tags, tag_da.TAGS_CACHE_TTL)
+    return tags
+
+
+async def _load_reactions(bind, post_ids: list[int]) -> Dict[int, Dict[int, int]]:
+    counts = await reaction.get_cached_reaction_counts(post_ids)
+    missing = [post_id for post_id in post_ids if post_id not in counts]
+    if missing:
+        counts.update(await _in_session(bind, reaction.get_reaction_counts, missing))
+    return {post_id: counts[post_id] for post_id in post_ids}
+
+
+async def _compute_similar_ids(bind, thread_ids: list[int]) -> dict[int, list[dict]]:
+    # Similar threads are a nice-to-have on the page, so a Neo4j outage leaves them empty (and uncached)
+    try:
+        computed = await similar.compute_similar_threads_async(bind, thread_ids)
+    except (Neo4jError, DriverError) as e:
+        logger.warning(f"Similar threads unavailable for threads {thread_ids}: {e}")
+        return {thread_id: [] for thread_id in thread_ids}
+    await similar.cache_similar_threads(computed)
+    return computed
+
+
+async def _load_similar_ids(bind, thread_id: int) -> list[dict]:
+    similar_threads = await similar.get_cached_similar_threads(thread_id)
+    if similar_threads is None:
+        similar_threads = (await _compute_similar_ids(bind, [thread_id]))[thread_id]
+    return similar_threads
+
+
+@router.get("/{thread_id}/page", response_model=ThreadPage)
+async def get_thread_page(session: ReadSessionDep, loaders: ReadLoadersDep, response: Response, thread_id: int, limit: int = 10, offset: int = 0):
+    """
+    Everything needed to render a thread page in one round trip.
+
+    Postgres and Redis are queried concurrently in two rounds: the parts keyed only by
+    thread_id first, then authors, reactions and similar threads, which need the first round's
+    results. Per-part latencies are reported in the Server-Timing header.
+    """
+    bind = session.get_bind()
+    timings: dict[str, float] = {}
+    start = time.perf_counter()
+
+    thread, posts, tags, similar_ids = await asyncio.gather(
+        _timed(timings, "thread", _in_session(bind, _load_thread, thread_id)),
+        _timed(timings, "posts", _in_session(bind, _load_posts, thread_id, limit, offset)),
+        _timed(timings, "tags", _load_tags(bind, thread_id)),
+        _timed(timings, "similar_ids", _load_similar_ids(bind, thread_id)),
+    )
+    if thread is None:
+        raise HTTPException(status_code=404, detail="Thread not found")
+
+    post_ids = [post.id for post in posts]
+    author_ids = list({post.user_id for post in posts})
+    authors, reactions, similar_threads = await asyncio.gather(
+        _timed(timings, "authors", _load_authors(loaders, author_ids)),
+        _timed(timings, "reactions", _load_reactions(bind, post_ids)),
+        _timed(timings, "similar_threads", _in_session(bind, thread_da.rank_similar_threads, similar_ids)),
+    )
+
+    timings["total"] = (time.perf_counter() - start) * 1000
+    response.headers["Server-Timing"] = ", ".join(f"{name};dur={duration:.1f}" for name, duration in timings.items())
+    return ThreadPage(
+        thread=thread,
+        posts=posts,
+        authors=authors,
+        tags=tags,
+        reactions=reactions,
+        similar_threads=similar_threads,
+    )
+
+async def _clear_thread_state(thread_id: int, post_ids: list[int]) -> None:
+    await similar.evict_similar_threads(thread_id)
+    await redis_conn.remove(f"{tag_da.THREAD_TAGS_KEY_PREFIX}{thread_id}")
+    await reaction.clear_reaction_state(post_ids)
+
+
+@router.delete("/{thread_id}", response_model=Message)
+def delete_thread(session: SessionDep, thread_id: int, current_user: CurrentUser):
+    if current_user.level != 0:
+        raise HTTPException(status_code=403, detail="Only admin can delete thread")
     db_thread = session.exec(select(Thread).where(Thread.id == thread_id)).first()
     if db_thread is None:
         raise HTTPException(status_code=404, detail="Thread not found")
-    return db_thread
+    post_ids = select(Post.id).where(Post.thread_id == thread_id)
+    deleted_post_ids = session.exec(post_ids).all()
+    session.exec(delete(PostReaction).where(PostReaction.post_id.in_(post_ids)))
+    session.exec(delete(PostReactionCount).where(PostReactionCount.post_id.in_(post_ids)))
+    session.exec(delete(Post).where(Post.thread_id == thread_id))
+    session.exec(delete(ThreadTag).where(ThreadTag.thread_id == thread_id))
+    session.exec(delete(GraphOutbox).where(GraphOutbox.thread_id == thread_id))
+    session.exec(delete(ThreadView).where(ThreadView.thread_id == thread_id))
+    session.exec(delete(Thread).where(Thread.id == thread_id))
+    # Queue the decrement in the same transaction as the delete so the listing total never drifts
+    counter.record_delta(session, counter.CATEGORY, db_thread.category_id, -1)
+    session.commit()
+    thread_da.THREAD_CACHE.delete(thread_id)
+    try:
+        anyio.from_thread.run(_clear_thread_state, thread_id, deleted_post_ids)
+    except (RedisError, RuntimeError):
+        # Leftover keys expire on their own, and deleted threads and posts are never hydrated
+        logger.warning(f"Could not clear the cached state of deleted thread {thread_id}")
+    return Message(message="Thread deleted successfully")
 
 @router.get("/{thread_id}/posts", response_model=List[PostResponse])
-def get_posts(session: SessionDep, thread_id: int, limit: int = 10, offset: int = 0):
+def get_posts(session: ReadSessionDep, thread_id: int, limit: int = 10, offset: int = 0, include_quotes: bool = False):
     thread = session.exec(select(Thread).where(Thread.id == thread_id)).first()
     if thread is None:
         raise HTTPException(status_code=404, detail="Thread not found") 
     db_posts = session.exec(select(Post).where(Post.thread_id == thread_id).order_by(Post.id.asc()).offset(offset).limit(limit)).all()
-    return db_posts 
-
-@router.get("/posts/reaction/{post_id}", response_model=Dict[int, PostReaction])
-def get_post_reactions(session: SessionDep, post_ids: List[int]):
-    db_posts = session.exec(select(PostReaction).where(PostReaction.post_id.in_(post_ids))).all()
-    return {post_id: db_posts for post_id in post_ids}
+    if include_quotes:
+        return post_da.with_quotes(session, db_posts)
+    return db_posts
+
+@router.get("/posts/reactions", response_model=Dict[int, Dict[int, int]])
+async def get_post_reactions(session: ReadSessionDep, post_ids: List[int] = Query(..., description="List of post IDs to fetch")):
+    """
+    Reaction counts per post as {post_id: {reaction_type: count}}.
+    """
+    return await reaction.get_live_reaction_counts(session, post_ids)
+
+@router.get("/posts/reactions/me", response_model=Dict[int, List[int]])
+async def get_my_post_reactions(session: ReadSessionDep, current_user: CurrentUser, post_ids: List[int] = Query(..., description="List of post IDs to fetch")):
+    """
+    Reaction types the current user left on each post.
+    """
+    return await reaction.get_user_reactions(session, current_user.id, post_ids)
+
+
+class ReactionToggleResponse(SQLModel):
+    post_id: int
+    reaction_type: int
+    reacted: bool
+    counts: Dict[int, int]
+
+def _post_exists(session: Session, post_id: int) -> bool:
+    return session.exec(select(Post.id).where(Post.id == post_id)).first() is not None
+
+
+@router.post("/posts/{post_id}/reaction", response_model=ReactionToggleResponse)
+async def toggle_post_reaction(
+    session: SessionDep,
+    post_id: int,
+    current_user: CurrentUser,
+    reaction_type: int = Query(..., ge=0, le=reaction.MAX_REACTION_TYPE),
+):
+    """
+    Add the reaction if the current user hasn't left it yet, otherwise remove it.
+    Returns the updated counts of the post right away; Postgres is updated in batches.
+    """
+    if not await asyncio.to_thread(_post_exists, session, post_id):
+        raise HTTPException(status_code=404, detail="Post not found")
+    try:
+        reacted, counts = await reaction.toggle_reaction(session, post_id, current_user.id, reaction_type)
+    except (RedisError, RuntimeError):
+        # Without Redis there is nothing to buffer in, so write through to Postgres
+        reacted, counts = await asyncio.to_thread(reaction.toggle_reaction_in_db, session, post_id, current_user.id, reaction_type)
+    return ReactionToggleResponse(post_id=post_id, reaction_type=reaction_type, reacted=reacted, counts=counts)
 
 
 @router.post("/{thread_id}/view")
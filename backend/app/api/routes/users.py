@@ -1,17 +1,22 @@
 import uuid
 from typing import Any, List
 
-from fastapi import APIRouter, Depends, HTTPException
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session, col, delete, func, select
 
 from app import crud
 from app.api.deps import (
     CurrentUser,
+    LoadersDep,
+    ReadSessionDep,
     SessionDep,
     get_current_active_superuser,
 )
 from app.core.config import settings
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash_async, verify_password_async
+from app.data_access import user as user_da
 from app.models.user import (
     Message,
     UpdatePassword,
@@ -34,18 +39,19 @@ def read_users(
     current_user: CurrentUser,
     skip: int = 0,
     limit: int = 100,
+    estimate_count: bool = False,
 ) -> Any:
     """
-    Retrieve users.
+    Retrieve users. Set `estimate_count` to get an approximate total from
+    table statistics instead of counting every row.
     """
     if current_user.level == 0:
-        count_statement = select(User)
-        count = session.exec(count_statement).count()
+        count = crud.count_rows(session=session, model=User, estimate=estimate_count)
         statement = select(User).offset(skip).limit(limit)
         users = session.exec(statement).all()
     else:
-        count_statement = select(User).where(User.id == current_user.id)
-        count = session.exec(count_statement).count()
+        count_statement = select(func.count()).select_from(User).where(User.id == current_user.id)
+        count = session.exec(count_statement).one()
         statement = select(User).where(User.id == current_user.id).offset(skip).limit(limit)
         users = session.exec(statement).all()
 
@@ -53,12 +59,13 @@ def read_users(
 
 
 @router.post("/", response_model=UserPublic)
-def create_user_open(
+async def create_user_open(
     *,
     session: SessionDep,
     user_in: UserRegister,
 ) -> Any:
-    user = crud.get_user_by_email(session=session, email=user_in.email)
+    # Async for the pooled hash; the blocking session work still goes to the threadpool
+    user = await run_in_threadpool(crud.get_user_by_email, session=session, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
@@ -70,7 +77,8 @@ def create_user_open(
         user_name=user_in.user_name,
         level=2,
     )
-    user = crud.create_user(session=session, user_create=user_create)
+    hashed_password = await get_password_hash_async(user_create.password)
+    user = await run_in_threadpool(crud.create_user, session=session, user_create=user_create, hashed_password=hashed_password)
     return user
 
 
@@ -93,26 +101,31 @@ def update_user_me(
     session.add(current_user)
     session.commit()
     session.refresh(current_user)
+    # The handler runs in the threadpool, the Redis client lives on the event loop
+    anyio.from_thread.run(user_da.invalidate_user, current_user.id)
     return current_user
 
 
 @router.patch("/me/password", response_model=Message)
-def update_password_me(
+async def update_password_me(
     *, session: SessionDep, body: UpdatePassword, current_user: CurrentUser
 ) -> Any:
     """
     Update own password.
     """
-    if not verify_password(body.current_password, current_user.hashed_password):
+    # A cached principal loads hashed_password lazily, i.e. with a query
+    current_hash = await run_in_threadpool(lambda: current_user.hashed_password)
+    if not await verify_password_async(body.current_password, current_hash):
         raise HTTPException(status_code=400, detail="Incorrect password")
     if body.current_password == body.new_password:
         raise HTTPException(
             status_code=400, detail="New password cannot be the same as the current one"
         )
-    hashed_password = get_password_hash(body.new_password)
+    hashed_password = await get_password_hash_async(body.new_password)
     current_user.hashed_password = hashed_password
     session.add(current_user)
-    session.commit()
+    await run_in_threadpool(session.commit)
+    await user_da.invalidate_user(current_user.id)
     return Message(message="Password updated successfully")
 
 
@@ -138,19 +151,32 @@ def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
         )
     session.delete(current_user)
     session.commit()
+    anyio.from_thread.run(user_da.invalidate_user, current_user.id)
     return Message(message="User deleted successfully")
 
 
+@router.get("/batch", response_model=List[UserPublic])
+async def read_users_batch(
+    session: ReadSessionDep,
+    ids: List[int] = Query(..., max_length=100, description="User IDs to fetch"),
+) -> Any:
+    """
+    Public profiles of several users, e.g. the authors of a page of posts.
+    Unknown ids are left out of the result.
+    """
+    return await user_da.get_public_profiles(session, ids)
+
+
 @router.get("/{user_id}", response_model=UserPublic)
-def read_user_by_id(
+async def read_user_by_id(
     user_id: int,
-    session: SessionDep,
+    loaders: LoadersDep,
     current_user: CurrentUser,
 ) -> Any:
     """
     Get a specific user by id.
     """
-    user = session.get(User, user_id)
+    user = await loaders.users.load(user_id)
     if user == current_user:
         return user
     if current_user.level != 0:
@@ -189,13 +215,15 @@ def update_user(
 
     update_data = user_in.model_dump(exclude_unset=True)
     if "password" in update_data:
-        hashed_password = get_password_hash(update_data["password"])
+        hashed_password = anyio.from_thread.run(get_password_hash_async, update_data["password"])
         del update_data["password"]
         update_data["hashed_password"] = hashed_password
     db_user.sqlmodel_update(update_data)
     session.add(db_user)
     session.commit()
     session.refresh(db_user)
+    # Covers ban, level and name changes
+    anyio.from_thread.run(user_da.invalidate_user, user_id)
     return db_user
 
 
@@ -215,11 +243,5 @@ def delete_user(
         raise HTTPException(status_code=400, detail="User cannot delete itself")
     session.delete(user)
     session.commit()
+    anyio.from_thread.run(user_da.invalidate_user, user_id)
     return Message(message="User deleted successfully")
-
-@router.get("/{user_id}/posts", response_model=UsersPublic)
-def get_users_by_ids(session: SessionDep, user_ids: List[int]):
-    db_users = session.exec(select(User).where(User.id.in_(user_ids))).all()
-    return UsersPublic(data=db_users, count=len(db_users))
-
-
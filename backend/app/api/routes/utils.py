@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
-from app.api.deps import get_current_active_superuser
+from app.api.deps import ReadSessionDep, get_current_active_superuser
+from app.core.security import password_hash_pool
+from app.data_access import outbox
 from app.models.user import Message
 from app.utils import generate_test_email, send_email
 
@@ -26,6 +28,28 @@ def test_email(email_to: EmailStr) -> Message:
     return Message(message="Test email sent")
 
 
+@router.get(
+    "/password-hash-stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def password_hash_stats() -> dict[str, float]:
+    """
+    Latency, queue wait and rejection counters of this worker's password hash pool.
+    """
+    return password_hash_pool.stats()
+
+
+@router.get(
+    "/graph-outbox-lag/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def graph_outbox_lag(session: ReadSessionDep) -> dict[str, float]:
+    """
+    Tag changes not yet applied to Neo4j, and the age of the oldest one.
+    """
+    return outbox.get_outbox_lag(session)
+
+
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
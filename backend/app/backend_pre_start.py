@@ -4,7 +4,10 @@ from sqlalchemy import Engine
 from sqlmodel import Session, select
 from tenacity import after_log, before_log, retry, stop_after_attempt, wait_fixed
 
+from app.core.config import settings
 from app.core.db import engine
+from app.core.neo4j import neo4j_conn
+from app.data_access import neo4j
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,9 +32,39 @@ def init(db_engine: Engine) -> None:
         raise e
 
 
+@retry(
+    stop=stop_after_attempt(max_tries),
+    wait=wait_fixed(wait_seconds),
+    before=before_log(logger, logging.INFO),
+    after=after_log(logger, logging.WARN),
+)
+def init_graph_schema() -> None:
+    try:
+        with neo4j_conn.driver.session() as neo4j_session:
+            neo4j.ensure_graph_schema(neo4j_session)
+            missing = neo4j.missing_graph_indexes(neo4j_session)
+    except Exception as e:
+        logger.error(e)
+        raise e
+    if missing:
+        # Indexes build in the background on a large graph, so report instead of failing
+        logger.warning(f"Neo4j indexes not online yet: {', '.join(missing)}")
+    else:
+        logger.info("Neo4j constraints and indexes are in place")
+
+
 def main() -> None:
     logger.info("Initializing service")
     init(engine)
+    if settings.SIMILAR_THREADS_BACKEND == "neo4j":
+        init_graph_schema()
+    else:
+        # Neo4j only receives the graph outbox then, which catches up once it is reachable
+        try:
+            init_graph_schema.retry_with(stop=stop_after_attempt(1), reraise=True)()
+        except Exception as e:
+            logger.warning(f"Neo4j unavailable, skipping graph schema setup: {e}")
+    neo4j_conn.close()
     logger.info("Service finished initializing")
 
 
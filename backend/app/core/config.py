@@ -69,6 +69,46 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Optional read replicas as "host" or "host:port", comma separated.
+    # Read-only endpoints are routed to them, everything else stays on the primary.
+    POSTGRES_REPLICA_SERVERS: Annotated[
+        list[str] | str, BeforeValidator(parse_cors)
+    ] = []
+    # Seconds before a replica that failed its health check is probed again
+    REPLICA_HEALTH_CHECK_INTERVAL: int = 10
+    # After a client writes, its reads stay on the primary this long to cover replica lag
+    READ_YOUR_WRITES_SECONDS: int = 5
+
+    # bcrypt runs in its own process pool so logins don't starve the request threadpool
+    PASSWORD_HASH_WORKERS: int = 2
+    # Hash jobs allowed to wait for a worker before requests get a 503
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+
+    # Where similar threads are computed: SQL over threadtag, the in-process tag index, or Neo4j
+    SIMILAR_THREADS_BACKEND: Literal["postgres", "memory", "neo4j"] = "postgres"
+    # Weight shared tags by IDF in the memory backend, so rare tags count more than popular ones
+    SIMILAR_THREADS_IDF: bool = False
+    # Seconds before the in-process tag index is fully reloaded from threadtag
+    TAG_INDEX_MAX_AGE: int = 600
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_REPLICA_URIS(self) -> list[PostgresDsn]:
+        uris = []
+        for server in self.POSTGRES_REPLICA_SERVERS:
+            host, _, port = server.partition(":")
+            uris.append(
+                MultiHostUrl.build(
+                    scheme="postgresql+psycopg",
+                    username=self.POSTGRES_USER,
+                    password=self.POSTGRES_PASSWORD,
+                    host=host,
+                    port=int(port) if port else self.POSTGRES_PORT,
+                    path=self.POSTGRES_DB,
+                )
+            )
+        return uris
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -101,6 +141,15 @@ class Settings(BaseSettings):
     REDIS_DB: int = 0
     REDIS_PASSWORD: str | None = None
 
+    # Neo4j Settings
+    NEO4J_URI: str = "bolt://neo4j:7687"
+    NEO4J_USER: str = "neo4j"
+    NEO4J_PASSWORD: str = "password"
+    # Connections per driver (one per worker process); the pool bounds concurrent graph queries
+    NEO4J_MAX_CONNECTION_POOL_SIZE: int = 50
+    # Seconds a query waits for a free pooled connection before failing
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT: float = 5.0
+
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
             message = (
@@ -0,0 +1,89 @@
+import asyncio
+from collections.abc import Callable, Hashable, Iterable, Mapping
+from typing import Any
+
+from sqlalchemy import Engine
+from sqlmodel import Session, SQLModel, select
+
+from app.models.thread import Tag, Thread
+from app.models.user import User
+
+
+class DataLoader:
+    """
+    Request-scoped batching loader. Every ``load(key)`` made during the same event loop tick
+    is resolved by a single ``batch_load(keys)`` call, and results (misses included, as None)
+    are memoized for the rest of the loader's life. ``batch_load`` is blocking and runs in a
+    worker thread, so it must not share a session with code running on the event loop.
+    """
+
+    def __init__(self, batch_load: Callable[[list[Hashable]], Mapping[Hashable, Any]]):
+        self._batch_load = batch_load
+        self._futures: dict[Hashable, asyncio.Future] = {}
+        self._pending: list[Hashable] = []
+        self._batches: set[asyncio.Task] = set()
+
+    def load(self, key: Hashable) -> asyncio.Future:
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[key] = future
+            if not self._pending:
+                # Dispatch two hops later, so tasks created alongside this call (e.g. by gather)
+                # get to run their first step and queue their keys too
+                loop.call_soon(loop.call_soon, self._dispatch)
+            self._pending.append(key)
+        return future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> list[Any]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: Hashable, value: Any) -> None:
+        if key not in self._futures:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._futures[key] = future
+
+    def clear(self, key: Hashable) -> None:
+        self._futures.pop(key, None)
+
+    def _dispatch(self) -> None:
+        keys, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._load_batch(keys))
+        # The loop only keeps weak references to tasks
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _load_batch(self, keys: list[Hashable]) -> None:
+        try:
+            found = await asyncio.to_thread(self._batch_load, keys)
+        except Exception as e:
+            for key in keys:
+                # Don't memoize failures, a later load retries
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key in keys:
+            future = self._futures[key]
+            if not future.done():
+                future.set_result(found.get(key))
+
+
+def _by_id(bind: Engine, model: type[SQLModel]) -> Callable[[list[int]], dict[int, Any]]:
+    def batch_load(ids: list[int]) -> dict[int, Any]:
+        # A session per batch: batches run in worker threads, and the rows come back detached
+        with Session(bind) as session:
+            rows = session.exec(select(model).where(model.id.in_(ids))).all()
+        return {row.id: row for row in rows}
+    return batch_load
+
+
+class Loaders:
+    """The loaders of one request, all bound to the engine of the request's session."""
+
+    def __init__(self, bind: Engine):
+        self.users = DataLoader(_by_id(bind, User))
+        self.threads = DataLoader(_by_id(bind, Thread))
+        self.tags = DataLoader(_by_id(bind, Tag))
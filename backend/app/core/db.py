@@ -1,13 +1,79 @@
+import itertools
+import logging
+import threading
+import time
+
+from sqlalchemy import Engine
+from sqlalchemy.exc import OperationalError
+
 from app import crud
 from app.core.config import settings
 from app.models.user import User, UserCreate
 from app.models.thread import Thread
 from app.models.category import Category
-from sqlmodel import Session, create_engine, select
+from sqlmodel import Session, create_engine, select, text
 from app.core.security import get_password_hash
+
+logger = logging.getLogger(__name__)
+
 engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
 
 
+class ReplicaRouter:
+    """Round-robin over healthy read replicas, falling back to the primary when none is usable."""
+
+    def __init__(self, primary: Engine, replicas: list[Engine], health_check_interval: int):
+        self.primary = primary
+        self.replicas = replicas
+        self.health_check_interval = health_check_interval
+        self._next = itertools.count()
+        self._down_until: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def get_engine(self) -> Engine:
+        if not self.replicas:
+            return self.primary
+        start = next(self._next)
+        now = time.monotonic()
+        for offset in range(len(self.replicas)):
+            index = (start + offset) % len(self.replicas)
+            down_until = self._down_until.get(index)
+            if down_until is None:
+                return self.replicas[index]
+            # A failed replica is only probed again once its back-off has expired
+            if down_until <= now and self._probe(index):
+                return self.replicas[index]
+        return self.primary
+
+    def mark_down(self, replica: Engine) -> None:
+        if replica not in self.replicas:
+            return
+        index = self.replicas.index(replica)
+        with self._lock:
+            self._down_until[index] = time.monotonic() + self.health_check_interval
+        logger.warning(f"Read replica {replica.url.host}:{replica.url.port} marked down")
+
+    def _probe(self, index: int) -> bool:
+        replica = self.replicas[index]
+        try:
+            with replica.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        except OperationalError:
+            self.mark_down(replica)
+            return False
+        with self._lock:
+            self._down_until.pop(index, None)
+        logger.info(f"Read replica {replica.url.host}:{replica.url.port} is back up")
+        return True
+
+
+replica_engines = [
+    create_engine(str(uri), pool_pre_ping=True, connect_args={"connect_timeout": 2})
+    for uri in settings.SQLALCHEMY_REPLICA_URIS
+]
+read_router = ReplicaRouter(engine, replica_engines, settings.REPLICA_HEALTH_CHECK_INTERVAL)
+
+
 # make sure all SQLModel models are imported (app.models) before initializing DB
 # otherwise, SQLModel might fail to initialize relationships properly
 # for more details: https://github.com/fastapi/full-stack-fastapi-template/issues/28
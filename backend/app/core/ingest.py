@@ -0,0 +1,106 @@
+import json
+import logging
+import queue
+import threading
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from pathlib import Path
+from typing import NamedTuple
+
+try:
+    import orjson
+except ImportError:  # optional, install the "ingest" extra for faster parsing
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# How far the parser may run ahead of the writer: at most PREFETCH_MAX_CHUNKS chunks
+# of PREFETCH_CHUNK_SIZE records are buffered, whatever the size of the file
+PREFETCH_CHUNK_SIZE = 1000
+PREFETCH_MAX_CHUNKS = 8
+
+loads = orjson.loads if orjson is not None else json.loads
+
+
+class PostRecord(NamedTuple):
+    # One line of a crawled data file, fields in staging_post column order
+    seq: int
+    origin_user_id: int
+    user_name: str | None
+    content: str
+    created_at: str
+
+
+def read_lines(path: Path) -> Iterator[bytes]:
+    # Bytes, both decoders take them and orjson skips a decode step
+    with open(path, "rb") as f:
+        yield from f
+
+
+def parse_posts(lines: Iterable[bytes], source: str | Path = "") -> Iterator[PostRecord]:
+    """Parse JSON lines into PostRecords, skipping (and logging) invalid ones."""
+    for seq, line in enumerate(lines):
+        try:
+            data = loads(line)
+            yield PostRecord(seq, data["user_id"], data["user_name"], data["content"], data["message_time"])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Skipping invalid line {seq} of {source}: {e} - Line: {line[:100]!r}...")
+
+
+class _Failure(NamedTuple):
+    error: BaseException
+
+
+_DONE = object()
+
+
+def prefetch(
+    iterable: Iterable,
+    chunk_size: int = PREFETCH_CHUNK_SIZE,
+    max_chunks: int = PREFETCH_MAX_CHUNKS,
+) -> Iterator:
+    """
+    Iterate ``iterable`` in a background thread, so producing items overlaps with consuming them.
+    Items are handed over in chunks through a bounded queue: when the consumer falls behind, the
+    producer blocks instead of buffering more. Producer errors are re-raised in the consumer.
+    """
+    chunks: queue.Queue = queue.Queue(maxsize=max_chunks)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        iterator = iter(iterable)
+        try:
+            while chunk := list(islice(iterator, chunk_size)):
+                if not put(chunk):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_Failure(e))
+        finally:
+            # Closes the file of a generator the consumer stopped reading early
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    producer = threading.Thread(target=produce, name="prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield from item
+    finally:
+        stop.set()
+        producer.join()
@@ -1,30 +1,34 @@
-from neo4j import GraphDatabase
-import asyncio
-import os
+from neo4j import AsyncGraphDatabase, GraphDatabase
 from contextlib import asynccontextmanager
 
+from app.core.config import settings
+
 class Neo4jConnection:
-    def __init__(self, uri=None, user=None, password=None, max_sessions=None):
-        # Use environment variables with defaults
-        self.uri = uri or os.getenv("NEO4J_URI", "bolt://neo4j:7687")
-        self.user = user or os.getenv("NEO4J_USER", "neo4j")
-        self.password = password or os.getenv("NEO4J_PASSWORD", "password")
-        self.max_sessions = max_sessions or int(os.getenv("NEO4J_MAX_SESSIONS", "10"))
+    def __init__(self, uri=None, user=None, password=None, max_connection_pool_size=None):
+        self.uri = uri or settings.NEO4J_URI
+        self.user = user or settings.NEO4J_USER
+        self.password = password or settings.NEO4J_PASSWORD
+        self.max_connection_pool_size = max_connection_pool_size or settings.NEO4J_MAX_CONNECTION_POOL_SIZE
+        driver_kwargs = {
+            "auth": (self.user, self.password),
+            "max_connection_pool_size": self.max_connection_pool_size,
+            "connection_acquisition_timeout": settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+        }
 
-        # Initialize the Neo4j driver
-        self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
-        self.semaphore = asyncio.Semaphore(self.max_sessions)  # Limit concurrent sessions
+        # The async driver serves the API (similar threads on a cache miss, the startup index check);
+        # its connection pool bounds concurrent sessions. The sync driver serves Celery tasks and scripts.
+        self.async_driver = AsyncGraphDatabase.driver(self.uri, **driver_kwargs)
+        self.driver = GraphDatabase.driver(self.uri, **driver_kwargs)
 
     def close(self):
         self.driver.close()
 
+    async def aclose(self):
+        await self.async_driver.close()
+
     @asynccontextmanager
     async def get_session(self):
-        async with self.semaphore:  # Acquire a slot from the semaphore
-            session = self.driver.session()
-            try:
-                yield session
-            finally:
-                session.close()
+        async with self.async_driver.session() as session:
+            yield session
 
-neo4j_conn = Neo4jConnection()
\ No newline at end of file
+neo4j_conn = Neo4jConnection()
@@ -209,6 +209,51 @@ class RedisConnection:
             logger.error(f"Error trimming Redis list '{key}': {e}")
             return False
 
+    async def hmget(self, key: str, fields: list) -> list:
+        """Get several fields of a Redis hash. Missing fields come back as None."""
+        try:
+            client = self.get_client()
+            return await client.hmget(key, fields)
+        except Exception as e:
+            logger.error(f"Error getting fields of Redis hash '{key}': {e}")
+            return [None] * len(fields)
+
+    async def hset_many(self, key: str, mapping: dict, ttl: Optional[int] = None) -> bool:
+        """Set several fields of a Redis hash, optionally refreshing the key TTL (in seconds)."""
+        try:
+            client = self.get_client()
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.hset(key, mapping=mapping)
+                if ttl:
+                    pipe.expire(key, ttl)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error setting fields of Redis hash '{key}': {e}")
+            return False
+
+    async def mget(self, keys: list) -> list:
+        """Get several keys in one round trip. Missing keys come back as None."""
+        try:
+            client = self.get_client()
+            return await client.mget(keys)
+        except Exception as e:
+            logger.error(f"Error getting {len(keys)} Redis keys: {e}")
+            return [None] * len(keys)
+
+    async def set_many(self, mapping: dict, ttl: Optional[int] = None) -> bool:
+        """Set several string keys in one round trip, optionally with a TTL (in seconds)."""
+        try:
+            client = self.get_client()
+            async with client.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    pipe.set(key, value, ex=ttl)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error setting {len(mapping)} Redis keys: {e}")
+            return False
+
     async def pipeline(self):
         """Get a Redis pipeline."""
         try:
@@ -1,16 +1,28 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Callable
 
 import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 ALGORITHM = "HS256"
 
+# Stored instead of a bcrypt hash for accounts that can't log in until they set a password through
+# password recovery (e.g. users imported from a crawl). No bcrypt hash starts with "!", so nothing
+# ever matches it, and a login attempt fails like any wrong password.
+UNUSABLE_PASSWORD_HASH = "!"
+
 
 def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
     expire = datetime.now(timezone.utc) + expires_delta
@@ -19,9 +31,102 @@ def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
     return encoded_jwt
 
 
+def is_password_usable(hashed_password: str) -> bool:
+    return not hashed_password.startswith(UNUSABLE_PASSWORD_HASH)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
+    if not is_password_usable(hashed_password):
+        return False
     return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+class PasswordHashPoolBusy(Exception):
+    """Raised when the password hash pool already has as many jobs as it accepts."""
+
+
+def _timed_call(fn: Callable, submitted_at: float, *args: Any) -> tuple[Any, float, float]:
+    # Runs in a pool process; wall clock time is comparable across processes
+    started_at = time.time()
+    result = fn(*args)
+    return result, started_at - submitted_at, time.time() - started_at
+
+
+class PasswordHashPool:
+    """
+    Runs bcrypt in a dedicated, size-bounded process pool. At most ``max_workers`` jobs run and
+    ``max_queue`` wait; beyond that ``PasswordHashPoolBusy`` is raised instead of queueing more.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: ProcessPoolExecutor | None = None
+        self._in_flight = 0
+        self._stats = {
+            "completed": 0,
+            "rejected": 0,
+            "hash_seconds_total": 0.0,
+            "hash_seconds_max": 0.0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+        }
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, because forking a process that already runs threads can deadlock the child
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self._stats["rejected"] += 1
+            logger.warning(f"Password hash pool saturated with {self._in_flight} jobs, rejecting")
+            raise PasswordHashPoolBusy()
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result, queue_wait, hash_time = await loop.run_in_executor(
+                self._get_executor(), _timed_call, fn, time.time(), *args
+            )
+        finally:
+            self._in_flight -= 1
+        self._stats["completed"] += 1
+        self._stats["hash_seconds_total"] += hash_time
+        self._stats["hash_seconds_max"] = max(self._stats["hash_seconds_max"], hash_time)
+        self._stats["queue_wait_seconds_total"] += queue_wait
+        self._stats["queue_wait_seconds_max"] = max(self._stats["queue_wait_seconds_max"], queue_wait)
+        return result
+
+    def stats(self) -> dict[str, float]:
+        completed = self._stats["completed"]
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "hash_seconds_avg": self._stats["hash_seconds_total"] / completed if completed else 0.0,
+            "queue_wait_seconds_avg": self._stats["queue_wait_seconds_total"] / completed if completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hash_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    if not is_password_usable(hashed_password):
+        return False
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hash_pool.run(get_password_hash, password)
@@ -1,16 +1,19 @@
+import asyncio
 import uuid
 from typing import Any
 
-from sqlmodel import Session, select
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, func, select
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, verify_password_async
 from app.models.user import User, UserCreate, UserUpdate
 
 
-def create_user(*, session: Session, user_create: UserCreate) -> User:
-    db_obj = User.model_validate(
-        user_create, update={"hashed_password": get_password_hash(user_create.password)}
-    )
+def create_user(*, session: Session, user_create: UserCreate, hashed_password: str | None = None) -> User:
+    # Async callers pass a hash computed in the password hash pool
+    if hashed_password is None:
+        hashed_password = get_password_hash(user_create.password)
+    db_obj = User.model_validate(user_create, update={"hashed_password": hashed_password})
     print("db_obj", db_obj)
     session.add(db_obj)
     session.commit()
@@ -38,15 +41,33 @@ def get_user_by_email(*, session: Session, email: str) -> User | None:
     return session_user
 
 
-def authenticate(*, session: Session, email: str, password: str) -> User | None:
-    db_user = get_user_by_email(session=session, email=email)
+async def authenticate(*, session: Session, email: str, password: str) -> User | None:
+    # Only the password check is awaited on the loop, the lookup blocks and runs in a thread
+    db_user = await asyncio.to_thread(get_user_by_email, session=session, email=email)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    if not await verify_password_async(password, db_user.hashed_password):
         return None
     return db_user
 
 
+def count_rows(*, session: Session, model: type[SQLModel], estimate: bool = False) -> int:
+    """
+    Count the rows of a table. With ``estimate`` the planner statistics
+    (``pg_class.reltuples``) are used instead of scanning the whole table.
+    """
+    if estimate:
+        table_name = f'"{model.__tablename__}"'
+        reltuples = session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+            {"table_name": table_name},
+        ).scalar()
+        # reltuples is -1 (or missing) until the table has been analyzed
+        if reltuples is not None and reltuples >= 0:
+            return reltuples
+    return session.exec(select(func.count()).select_from(model)).one()
+
+
 # def create_item(*, session: Session, item_in: ItemCreate, owner_id: uuid.UUID) -> Item:
 #     db_item = Item.model_validate(item_in, update={"owner_id": owner_id})
 #     session.add(db_item)
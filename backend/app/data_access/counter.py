@@ -0,0 +1,95 @@
+from sqlalchemy import text
+from sqlmodel import Session, func, select
+
+from app.models.counter import CounterDelta
+
+THREAD = "thread"
+CATEGORY = "category"
+
+FOLD_BATCH_SIZE = 5000
+
+# Move a batch of deltas out of counterdelta and apply their sums to the parent rows
+# in one statement, so a fold either lands completely or not at all. Threads also get
+# their last post summary refreshed from the newest post; listings read updated_at and
+# last_post_* as of the last fold, while children_count adds the pending deltas.
+FOLD_QUERY = """
+    WITH moved AS (
+        DELETE FROM counterdelta
+        WHERE id IN (
+            SELECT id FROM counterdelta ORDER BY id LIMIT :batch_size FOR UPDATE SKIP LOCKED
+        )
+        RETURNING entity_type, entity_id, delta, created_at
+    ),
+    totals AS (
+        SELECT entity_type, entity_id, SUM(delta) AS delta, MAX(created_at) AS last_at, COUNT(*) AS row_count
+        FROM moved
+        GROUP BY entity_type, entity_id
+    ),
+    thread_totals AS (
+        SELECT totals.entity_id, totals.delta, totals.last_at,
+               last_post.id AS last_post_id, last_post.user_id AS last_post_user_id, last_post.created_at AS last_post_at
+        FROM totals
+        LEFT JOIN LATERAL (
+            SELECT post.id, post.user_id, post.created_at
+            FROM post
+            WHERE post.thread_id = totals.entity_id
+            ORDER BY post.id DESC
+            LIMIT 1
+        ) AS last_post ON true
+        WHERE totals.entity_type = 'thread'
+    ),
+    thread_fold AS (
+        UPDATE thread
+        SET children_count = thread.children_count + thread_totals.delta,
+            updated_at = GREATEST(thread.updated_at, thread_totals.last_at),
+            last_post_id = COALESCE(thread_totals.last_post_id, thread.last_post_id),
+            last_post_user_id = COALESCE(thread_totals.last_post_user_id, thread.last_post_user_id),
+            last_post_at = COALESCE(thread_totals.last_post_at, thread.last_post_at)
+        FROM thread_totals
+        WHERE thread.id = thread_totals.entity_id
+    ),
+    category_fold AS (
+        UPDATE category
+        SET children_count = category.children_count + totals.delta
+        FROM totals
+        WHERE totals.entity_type = 'category' AND category.id = totals.entity_id
+    )
+    SELECT COALESCE(SUM(row_count), 0) FROM totals
+"""
+
+
+def record_delta(session: Session, entity_type: str, entity_id: int, delta: int = 1) -> None:
+    """Queue a children_count change; it is committed with the caller's transaction."""
+    session.add(CounterDelta(entity_type=entity_type, entity_id=entity_id, delta=delta))
+
+
+def pending_delta_column(entity_type: str, entity_id_column):
+    """Correlated subquery with the not yet folded delta for each row of a select."""
+    return (
+        select(func.coalesce(func.sum(CounterDelta.delta), 0))
+        .where(CounterDelta.entity_type == entity_type, CounterDelta.entity_id == entity_id_column)
+        .correlate_except(CounterDelta)
+        .scalar_subquery()
+    )
+
+
+def get_pending_deltas(session: Session, entity_type: str, entity_ids: list[int]) -> dict[int, int]:
+    if not entity_ids:
+        return {}
+    query = (
+        select(CounterDelta.entity_id, func.sum(CounterDelta.delta))
+        .where(CounterDelta.entity_type == entity_type, CounterDelta.entity_id.in_(entity_ids))
+        .group_by(CounterDelta.entity_id)
+    )
+    return {entity_id: int(delta) for entity_id, delta in session.exec(query).all()}
+
+
+def get_pending_delta(session: Session, entity_type: str, entity_id: int) -> int:
+    return get_pending_deltas(session, entity_type, [entity_id]).get(entity_id, 0)
+
+
+def fold_pending_deltas(session: Session, batch_size: int = FOLD_BATCH_SIZE) -> int:
+    """Fold up to ``batch_size`` deltas into their parent rows. Returns the number folded."""
+    folded = session.execute(text(FOLD_QUERY), {"batch_size": batch_size}).scalar()
+    session.commit()
+    return int(folded or 0)
@@ -1,35 +1,79 @@
 from typing import Any
+from neo4j import AsyncSession as AsyncNeo4jSession
 from neo4j import Session as Neo4jSession
 
+# Every MERGE/MATCH on Thread.id or Tag.name relies on these; each uniqueness constraint is
+# backed by a range index of the same name. Statements are idempotent (IF NOT EXISTS).
+GRAPH_SCHEMA = {
+    "thread_id_unique": "CREATE CONSTRAINT thread_id_unique IF NOT EXISTS FOR (t:Thread) REQUIRE t.id IS UNIQUE",
+    "tag_name_unique": "CREATE CONSTRAINT tag_name_unique IF NOT EXISTS FOR (tag:Tag) REQUIRE tag.name IS UNIQUE",
+}
 
+# Index names that are present and usable
+ONLINE_INDEXES_QUERY = "SHOW INDEXES YIELD name, state WHERE state = 'ONLINE' RETURN name"
 
-def get_similar_threads(neo4j_session : Neo4jSession, thread_id: int, limit: int = 5)-> dict:
-    query = """
-        MATCH (t:Thread)-[:HAS_TAG]->(tag:Tag)<-[:HAS_TAG]-(other:Thread)
-        WHERE t.id = $thread_id AND t <> other
+# Top threads sharing the most tags with each of $thread_ids, in one round trip with one row per thread
+SIMILAR_THREADS_MANY_QUERY = """
+    UNWIND $thread_ids AS thread_id
+    CALL {
+        WITH thread_id
+        MATCH (t:Thread {id: thread_id})-[:HAS_TAG]->(tag:Tag)<-[:HAS_TAG]-(other:Thread)
+        WHERE t <> other
         WITH other, COUNT(tag) AS sharedTags
-        ORDER BY sharedTags DESC
-        RETURN other.id AS threadId, sharedTags
+        ORDER BY sharedTags DESC, other.id DESC
         LIMIT $limit
-       """
-    result = neo4j_session.run(query, thread_id=thread_id, limit=limit)
-    return [dict(record) for record in result]
-
-
-def add_tags_to_thread(thread_id: int, tags: list[str], *, neo4j_session: Neo4jSession):
-    # Ensure the Thread node exists using MERGE
-    merge_thread_query = """
-        MERGE (t:Thread {id: $thread_id})
-    """
-    neo4j_session.run(merge_thread_query, thread_id=thread_id)
-
-    # For each tag, ensure the Tag node exists and the relationship exists
-    for tag_name in tags:
-        merge_tag_rel_query = """
-            MATCH (t:Thread {id: $thread_id}) 
-            MERGE (tag:Tag {name: $tag_name}) 
-            MERGE (t)-[:HAS_TAG]->(tag)
-        """
-        neo4j_session.run(merge_tag_rel_query, thread_id=thread_id, tag_name=tag_name)
-
-    return {"message": "Tags added/merged successfully"}
+        RETURN collect({threadId: other.id, sharedTags: sharedTags}) AS similar
+    }
+    RETURN thread_id, similar
+"""
+
+
+def ensure_graph_schema(neo4j_session: Neo4jSession) -> None:
+    for statement in GRAPH_SCHEMA.values():
+        neo4j_session.run(statement).consume()
+
+
+def missing_graph_indexes(neo4j_session: Neo4jSession) -> list[str]:
+    online = {record["name"] for record in neo4j_session.run(ONLINE_INDEXES_QUERY)}
+    return [name for name in GRAPH_SCHEMA if name not in online]
+
+
+async def missing_graph_indexes_async(neo4j_session: AsyncNeo4jSession) -> list[str]:
+    result = await neo4j_session.run(ONLINE_INDEXES_QUERY)
+    online = {record["name"] async for record in result}
+    return [name for name in GRAPH_SCHEMA if name not in online]
+
+
+def get_similar_threads_many(neo4j_session: Neo4jSession, thread_ids: list[int], limit: int = 5) -> dict[int, list[dict]]:
+    result = neo4j_session.run(SIMILAR_THREADS_MANY_QUERY, thread_ids=thread_ids, limit=limit)
+    return {record["thread_id"]: record["similar"] for record in result}
+
+
+async def get_similar_threads_many_async(neo4j_session: AsyncNeo4jSession, thread_ids: list[int], limit: int = 5) -> dict[int, list[dict]]:
+    result = await neo4j_session.run(SIMILAR_THREADS_MANY_QUERY, thread_ids=thread_ids, limit=limit)
+    return {record["thread_id"]: record["similar"] async for record in result}
+
+
+TAG_BATCH_SIZE = 1000
+
+# Tags many threads in one round trip: rows is a list of {thread_id, tags: [tag names]}
+TAG_THREADS_QUERY = """
+    UNWIND $rows AS row
+    MERGE (t:Thread {id: row.thread_id})
+    WITH t, row
+    UNWIND row.tags AS tag_name
+    MERGE (tag:Tag {name: tag_name})
+    MERGE (t)-[:HAS_TAG]->(tag)
+"""
+
+
+def _tag_rows(thread_tags: list[tuple[int, list[str]]]) -> list[dict]:
+    return [{"thread_id": thread_id, "tags": list(tags)} for thread_id, tags in thread_tags]
+
+
+def add_tags_to_threads(thread_tags: list[tuple[int, list[str]]], *, neo4j_session: Neo4jSession, batch_size: int = TAG_BATCH_SIZE) -> int:
+    """Merge (thread_id, [tag names]) pairs into the graph, one UNWIND transaction per chunk."""
+    rows = _tag_rows(thread_tags)
+    for start in range(0, len(rows), batch_size):
+        neo4j_session.execute_write(lambda tx, chunk=rows[start:start + batch_size]: tx.run(TAG_THREADS_QUERY, rows=chunk).consume())
+    return len(rows)
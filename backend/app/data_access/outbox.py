@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from neo4j import Session as Neo4jSession
+from sqlmodel import Session, delete, func, select
+
+from app.data_access import neo4j
+from app.models.outbox import GraphOutbox
+from app.models.thread import Tag, ThreadTag
+
+DRAIN_BATCH_SIZE = 1000
+
+def record_thread_tags(session: Session, thread_id: int, tag_names: list[str]) -> None:
+    """Queue a graph change; commit it together with the threadtag rows it mirrors."""
+    session.add(GraphOutbox(thread_id=thread_id, tag_names=tag_names))
+
+def drain_outbox(session: Session, neo4j_session: Neo4jSession, batch_size: int = DRAIN_BATCH_SIZE) -> tuple[int, dict[int, set[str]]]:
+    """
+    Apply the oldest batch of outbox rows to Neo4j with one UNWIND write, then delete them.
+    MERGE is idempotent, so a batch applied twice (e.g. the delete failed) is harmless.
+    Returns the number of rows drained and the tag names applied per thread.
+    """
+    rows = session.exec(
+        select(GraphOutbox).order_by(GraphOutbox.id).limit(batch_size).with_for_update(skip_locked=True)
+    ).all()
+    if not rows:
+        session.rollback()
+        return 0, {}
+    thread_tags: dict[int, set[str]] = {}
+    for row in rows:
+        thread_tags.setdefault(row.thread_id, set()).update(row.tag_names)
+    neo4j.add_tags_to_threads(
+        [(thread_id, sorted(tag_names)) for thread_id, tag_names in thread_tags.items()],
+        neo4j_session=neo4j_session,
+    )
+    session.exec(delete(GraphOutbox).where(GraphOutbox.id.in_([row.id for row in rows])))
+    session.commit()
+    return len(rows), thread_tags
+
+def get_tag_ids(session: Session, thread_tags: dict[int, set[str]]) -> dict[int, list[int]]:
+    """Map the tag names applied per thread back to the thread's tag ids."""
+    names = set().union(*thread_tags.values()) if thread_tags else set()
+    rows = session.exec(
+        select(ThreadTag.thread_id, ThreadTag.tag_id, Tag.name)
+        .join(Tag, Tag.id == ThreadTag.tag_id)
+        .where(ThreadTag.thread_id.in_(list(thread_tags)), Tag.name.in_(list(names)))
+    ).all()
+    tag_ids: dict[int, list[int]] = {}
+    for thread_id, tag_id, name in rows:
+        if name in thread_tags[thread_id]:
+            tag_ids.setdefault(thread_id, []).append(tag_id)
+    return tag_ids
+
+def get_outbox_lag(session: Session) -> dict[str, float]:
+    pending, oldest = session.exec(select(func.count(), func.min(GraphOutbox.created_at))).one()
+    return {
+        "pending": pending,
+        "oldest_age_seconds": (datetime.now() - oldest).total_seconds() if oldest is not None else 0.0,
+    }
@@ -1,6 +1,6 @@
-from app.models.post import Post, PostCreate
+from app.models.post import Post, PostCreate, PostResponse, QuotedPost
 from app.api.deps import CurrentUser
-from sqlmodel import Session, select
+from sqlmodel import Session, func, select
 
 def create_post(db: Session, post: PostCreate, user: CurrentUser) -> Post:
     db_post = Post(**post.model_dump(), user_id=user.id)
@@ -17,4 +17,33 @@ def get_posts_by_thread(db: Session, thread_id: int) -> list[Post]:
 
 def get_posts_by_user(db: Session, user_id: int) -> list[Post]:
     return db.exec(select(Post).where(Post.user_id == user_id)).scalars().all()
-    
\ No newline at end of file
+    
+QUOTE_EXCERPT_LENGTH = 200
+
+def get_quoted_posts(db: Session, posts: list[Post]) -> dict[int, QuotedPost]:
+    """Resolve the quotes of a page of posts with a single query, keyed by quoted post id."""
+    quote_ids = {quote_id for post in posts for quote_id in post.quote_ids or []}
+    if not quote_ids:
+        return {}
+    rows = db.exec(
+        select(Post.id, Post.thread_id, Post.user_id, func.left(Post.content, QUOTE_EXCERPT_LENGTH), Post.created_at)
+        .where(Post.id.in_(quote_ids))
+    ).all()
+    return {
+        id: QuotedPost(id=id, thread_id=thread_id, user_id=user_id, excerpt=excerpt, created_at=created_at)
+        for id, thread_id, user_id, excerpt, created_at in rows
+    }
+
+def with_quotes(db: Session, posts: list[Post]) -> list[PostResponse]:
+    quoted = get_quoted_posts(db, posts)
+    return [
+        PostResponse.model_validate(post, update={"quotes": [quoted[id] for id in post.quote_ids or [] if id in quoted]})
+        for post in posts
+    ]
+
+def get_quoting_posts(db: Session, post_id: int, before_id: int | None = None, limit: int = 20) -> list[Post]:
+    """Newest first posts whose quote_ids contain post_id, served by the GIN index on quote_ids."""
+    statement = select(Post).where(Post.quote_ids.contains([post_id]))
+    if before_id is not None:
+        statement = statement.where(Post.id < before_id)
+    return db.exec(statement.order_by(Post.id.desc()).limit(limit)).all()
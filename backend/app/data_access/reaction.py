@@ -0,0 +1,345 @@
+import asyncio
+from collections import defaultdict
+
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, delete, select, update
+
+from app.core.redis import redis_conn
+from app.models.post import Post, PostReaction, PostReactionCount
+from app.models.user import User
+
+# Reaction types are stored as bits of a mask that must stay exact as a Lua number
+MAX_REACTION_TYPE = 30
+
+# Per-user hash of post_id -> bitmask of the reaction types the user left on that post
+USER_REACTIONS_KEY_PREFIX = "user_reactions:"
+USER_REACTIONS_TTL = 24 * 60 * 60  # 1 day in seconds
+
+# Write-behind state for toggles: who reacted (set per post and type), live counts (hash per post)
+# and the net changes not yet persisted (hash of "post_id:reaction_type:user_id" -> "1" add / "0" remove)
+REACTION_MEMBERS_KEY_PREFIX = "reaction_members:"
+REACTION_COUNTS_KEY_PREFIX = "reaction_counts:"
+REACTION_PENDING_KEY = "reaction_pending"
+REACTION_PENDING_PROCESSING_KEY = "reaction_pending:processing"
+# Flush attempts of the processing hash, and the changes set aside after too many failed attempts
+REACTION_FLUSH_ATTEMPTS_KEY = "reaction_pending:attempts"
+REACTION_PENDING_FAILED_KEY = "reaction_pending:failed"
+REACTION_STATE_TTL = 24 * 60 * 60  # 1 day in seconds
+# Marks a members set / counts hash as seeded from Postgres, so an empty one isn't seeded again
+SEEDED_MARKER = "_"
+
+# KEYS: members set, counts hash, user reactions hash, pending hash
+# ARGV: user_id, reaction_type, post_id, ttl
+TOGGLE_REACTION_SCRIPT = """
+local reacted = 1
+if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 1 then
+    redis.call('SREM', KEYS[1], ARGV[1])
+    redis.call('HINCRBY', KEYS[2], ARGV[2], -1)
+    reacted = 0
+else
+    redis.call('SADD', KEYS[1], ARGV[1])
+    redis.call('HINCRBY', KEYS[2], ARGV[2], 1)
+end
+local mask = redis.call('HGET', KEYS[3], ARGV[3])
+if mask then
+    mask = tonumber(mask)
+    local bit_value = 2 ^ tonumber(ARGV[2])
+    local has_bit = math.floor(mask / bit_value) % 2 == 1
+    if reacted == 1 and not has_bit then
+        mask = mask + bit_value
+    elseif reacted == 0 and has_bit then
+        mask = mask - bit_value
+    end
+    redis.call('HSET', KEYS[3], ARGV[3], string.format('%d', mask))
+end
+redis.call('HSET', KEYS[4], ARGV[3] .. ':' .. ARGV[2] .. ':' .. ARGV[1], reacted)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return {reacted, redis.call('HGETALL', KEYS[2])}
+"""
+
+
+def add_reaction(session: Session, post_id: int, user_id: int, reaction_type: int) -> bool:
+    """Insert a reaction and bump its aggregate. Returns False if it already existed."""
+    insert_reaction = (
+        insert(PostReaction)
+        .values(post_id=post_id, user_id=user_id, reaction_type=reaction_type)
+        .on_conflict_do_nothing(index_elements=["post_id", "user_id", "reaction_type"])
+        .returning(PostReaction.id)
+    )
+    if session.execute(insert_reaction).first() is None:
+        return False
+    bump_reaction_count(session, post_id, reaction_type, 1)
+    return True
+
+
+def remove_reaction(session: Session, post_id: int, user_id: int, reaction_type: int) -> bool:
+    """Delete a reaction and decrement its aggregate. Returns False if there was none."""
+    delete_reaction = (
+        delete(PostReaction)
+        .where(
+            PostReaction.post_id == post_id,
+            PostReaction.user_id == user_id,
+            PostReaction.reaction_type == reaction_type,
+        )
+        .returning(PostReaction.id)
+    )
+    if session.execute(delete_reaction).first() is None:
+        return False
+    bump_reaction_count(session, post_id, reaction_type, -1)
+    return True
+
+
+def bump_reaction_count(session: Session, post_id: int, reaction_type: int, delta: int) -> None:
+    if delta > 0:
+        upsert = (
+            insert(PostReactionCount)
+            .values(post_id=post_id, reaction_type=reaction_type, count=delta)
+            .on_conflict_do_update(
+                index_elements=["post_id", "reaction_type"],
+                set_={"count": PostReactionCount.count + delta},
+            )
+        )
+        session.execute(upsert)
+    elif delta < 0:
+        session.execute(
+            update(PostReactionCount)
+            .where(PostReactionCount.post_id == post_id, PostReactionCount.reaction_type == reaction_type)
+            .values(count=PostReactionCount.count + delta)
+        )
+
+
+def apply_reaction_changes(
+    session: Session,
+    added: list[tuple[int, int, int]],
+    removed: list[tuple[int, int, int]],
+) -> int:
+    """
+    Persist a batch of (post_id, user_id, reaction_type) changes with one insert, one delete and
+    one aggregate upsert. Rows that already existed / were already gone don't touch the counts,
+    and additions on posts or by users deleted since the toggle are dropped.
+    """
+    count_deltas: dict[tuple[int, int], int] = defaultdict(int)
+    if added:
+        existing_posts = set(session.exec(select(Post.id).where(Post.id.in_({p for p, _, _ in added}))).all())
+        existing_users = set(session.exec(select(User.id).where(User.id.in_({u for _, u, _ in added}))).all())
+        added = [(p, u, t) for p, u, t in added if p in existing_posts and u in existing_users]
+    if added:
+        insert_reactions = (
+            insert(PostReaction)
+            .values([{"post_id": p, "user_id": u, "reaction_type": t} for p, u, t in added])
+            .on_conflict_do_nothing(index_elements=["post_id", "user_id", "reaction_type"])
+            .returning(PostReaction.post_id, PostReaction.reaction_type)
+        )
+        for post_id, reaction_type in session.execute(insert_reactions).all():
+            count_deltas[(post_id, reaction_type)] += 1
+    if removed:
+        delete_reactions = (
+            delete(PostReaction)
+            .where(tuple_(PostReaction.post_id, PostReaction.user_id, PostReaction.reaction_type).in_(removed))
+            .returning(PostReaction.post_id, PostReaction.reaction_type)
+        )
+        for post_id, reaction_type in session.execute(delete_reactions).all():
+            count_deltas[(post_id, reaction_type)] -= 1
+
+    count_values = [
+        {"post_id": post_id, "reaction_type": reaction_type, "count": delta}
+        for (post_id, reaction_type), delta in count_deltas.items()
+        if delta != 0
+    ]
+    if count_values:
+        upsert = insert(PostReactionCount).values(count_values)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=["post_id", "reaction_type"],
+            set_={"count": PostReactionCount.count + upsert.excluded.count},
+        )
+        session.execute(upsert)
+    return len(count_values)
+
+
+def get_reaction_counts(session: Session, post_ids: list[int]) -> dict[int, dict[int, int]]:
+    """Compact {post_id: {reaction_type: count}} map for a page of posts, in one indexed query."""
+    query = select(PostReactionCount).where(PostReactionCount.post_id.in_(post_ids), PostReactionCount.count > 0)
+    counts: dict[int, dict[int, int]] = {post_id: {} for post_id in post_ids}
+    for row in session.exec(query).all():
+        counts[row.post_id][row.reaction_type] = row.count
+    return counts
+
+
+async def get_cached_reaction_counts(post_ids: list[int]) -> dict[int, dict[int, int]]:
+    """
+    Live counts of the posts with toggle state in Redis, which include changes the flush task
+    hasn't persisted yet. Posts without state (or all of them, if Redis is down) are left out.
+    """
+    try:
+        client = redis_conn.get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            for post_id in post_ids:
+                pipe.hgetall(f"{REACTION_COUNTS_KEY_PREFIX}{post_id}")
+            cached = await pipe.execute()
+    except Exception:
+        cached = [{}] * len(post_ids)
+
+    counts = {}
+    for post_id, live_counts in zip(post_ids, cached):
+        if live_counts:
+            counts[post_id] = {
+                int(reaction_type): int(count)
+                for reaction_type, count in live_counts.items()
+                if reaction_type != SEEDED_MARKER and int(count) > 0
+            }
+    return counts
+
+
+async def get_live_reaction_counts(session: Session, post_ids: list[int]) -> dict[int, dict[int, int]]:
+    """Like get_reaction_counts, but answered from the live Redis counts where there are some."""
+    counts = await get_cached_reaction_counts(post_ids)
+    missing = [post_id for post_id in post_ids if post_id not in counts]
+    if missing:
+        counts.update(await asyncio.to_thread(get_reaction_counts, session, missing))
+    return {post_id: counts[post_id] for post_id in post_ids}
+
+
+async def clear_reaction_state(post_ids: list[int]) -> None:
+    """Drop the live counts and member sets of deleted posts, so they aren't served or seeded from."""
+    if not post_ids:
+        return
+    client = redis_conn.get_client()
+    counts_keys = [f"{REACTION_COUNTS_KEY_PREFIX}{post_id}" for post_id in post_ids]
+    async with client.pipeline(transaction=False) as pipe:
+        for key in counts_keys:
+            pipe.hkeys(key)
+        reaction_types = await pipe.execute()
+    # Every toggled reaction type has a field in the counts hash next to its members set
+    members_keys = [
+        f"{REACTION_MEMBERS_KEY_PREFIX}{post_id}:{reaction_type}"
+        for post_id, types in zip(post_ids, reaction_types)
+        for reaction_type in types
+        if reaction_type != SEEDED_MARKER
+    ]
+    keys = counts_keys + members_keys
+    for start in range(0, len(keys), 1000):
+        await client.unlink(*keys[start:start + 1000])
+
+
+def to_reaction_mask(reaction_types) -> int:
+    mask = 0
+    for reaction_type in reaction_types:
+        mask |= 1 << reaction_type
+    return mask
+
+
+def from_reaction_mask(mask: int) -> list[int]:
+    return [reaction_type for reaction_type in range(mask.bit_length()) if mask >> reaction_type & 1]
+
+
+def _load_reaction_masks(session: Session, user_id: int, post_ids: list[int]) -> dict[int, int]:
+    query = select(PostReaction.post_id, PostReaction.reaction_type).where(
+        PostReaction.user_id == user_id, PostReaction.post_id.in_(post_ids)
+    )
+    reaction_types = defaultdict(list)
+    for post_id, reaction_type in session.exec(query).all():
+        reaction_types[post_id].append(reaction_type)
+    return {post_id: to_reaction_mask(reaction_types[post_id]) for post_id in post_ids}
+
+
+async def get_user_reactions(session: Session, user_id: int, post_ids: list[int]) -> dict[int, list[int]]:
+    """Reaction types the user left on each post, served from Redis and filled from Postgres on a miss."""
+    key = f"{USER_REACTIONS_KEY_PREFIX}{user_id}"
+    cached = await redis_conn.hmget(key, post_ids)
+    masks = {post_id: int(mask) for post_id, mask in zip(post_ids, cached) if mask is not None}
+
+    missing = [post_id for post_id in post_ids if post_id not in masks]
+    if missing:
+        # Posts without reactions are cached as 0 too, so they aren't queried again
+        filled = await asyncio.to_thread(_load_reaction_masks, session, user_id, missing)
+        await redis_conn.hset_many(key, filled, ttl=USER_REACTIONS_TTL)
+        masks.update(filled)
+
+    return {post_id: from_reaction_mask(masks[post_id]) for post_id in post_ids}
+
+
+def _load_seed_state(
+    session: Session, post_id: int, user_id: int, reaction_type: int, members: bool, counts: bool, mask: bool
+) -> tuple[list[int] | None, dict[int, int] | None, list[int] | None]:
+    """The reacting user ids, the counts and the user's reaction types of a post, for the parts asked for."""
+    user_ids = session.exec(
+        select(PostReaction.user_id).where(PostReaction.post_id == post_id, PostReaction.reaction_type == reaction_type)
+    ).all() if members else None
+    post_counts = get_reaction_counts(session, [post_id])[post_id] if counts else None
+    reaction_types = session.exec(
+        select(PostReaction.reaction_type).where(PostReaction.post_id == post_id, PostReaction.user_id == user_id)
+    ).all() if mask else None
+    return user_ids, post_counts, reaction_types
+
+
+async def _seed_reaction_state(session: Session, post_id: int, user_id: int, reaction_type: int) -> None:
+    """Load the Postgres state a toggle builds on into Redis, for whatever isn't cached yet."""
+    client = redis_conn.get_client()
+    members_key = f"{REACTION_MEMBERS_KEY_PREFIX}{post_id}:{reaction_type}"
+    counts_key = f"{REACTION_COUNTS_KEY_PREFIX}{post_id}"
+    user_key = f"{USER_REACTIONS_KEY_PREFIX}{user_id}"
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.exists(members_key)
+        pipe.exists(counts_key)
+        pipe.hexists(user_key, post_id)
+        members_cached, counts_cached, mask_cached = await pipe.execute()
+    if members_cached and counts_cached and mask_cached:
+        return
+
+    # One worker thread hop for the missing parts, so the queries don't block the event loop
+    user_ids, counts, reaction_types = await asyncio.to_thread(
+        _load_seed_state, session, post_id, user_id, reaction_type,
+        not members_cached, not counts_cached, not mask_cached,
+    )
+    async with client.pipeline(transaction=False) as pipe:
+        if not members_cached:
+            pipe.sadd(members_key, SEEDED_MARKER, *user_ids)
+            pipe.expire(members_key, REACTION_STATE_TTL)
+        if not counts_cached:
+            # HSETNX keeps whatever a concurrent toggle already wrote
+            pipe.hsetnx(counts_key, SEEDED_MARKER, 0)
+            for seeded_type, count in counts.items():
+                pipe.hsetnx(counts_key, seeded_type, count)
+            pipe.expire(counts_key, REACTION_STATE_TTL)
+        if not mask_cached:
+            pipe.hsetnx(user_key, post_id, to_reaction_mask(reaction_types))
+            pipe.expire(user_key, USER_REACTIONS_TTL)
+        await pipe.execute()
+
+
+async def toggle_reaction(session: Session, post_id: int, user_id: int, reaction_type: int) -> tuple[bool, dict[int, int]]:
+    """
+    Add the reaction if the user hasn't left it yet, otherwise remove it. The change is recorded
+    in Redis and persisted later by the flush task; returns (reacted, live counts of the post).
+    """
+    await _seed_reaction_state(session, post_id, user_id, reaction_type)
+    client = redis_conn.get_client()
+    reacted, flat_counts = await client.eval(
+        TOGGLE_REACTION_SCRIPT,
+        4,
+        f"{REACTION_MEMBERS_KEY_PREFIX}{post_id}:{reaction_type}",
+        f"{REACTION_COUNTS_KEY_PREFIX}{post_id}",
+        f"{USER_REACTIONS_KEY_PREFIX}{user_id}",
+        REACTION_PENDING_KEY,
+        user_id,
+        reaction_type,
+        post_id,
+        REACTION_STATE_TTL,
+    )
+    counts = {
+        int(field): int(value)
+        for field, value in zip(flat_counts[::2], flat_counts[1::2])
+        if field != SEEDED_MARKER and int(value) > 0
+    }
+    return bool(reacted), counts
+
+
+def toggle_reaction_in_db(session: Session, post_id: int, user_id: int, reaction_type: int) -> tuple[bool, dict[int, int]]:
+    """Synchronous toggle straight in Postgres, used when Redis is unavailable."""
+    reacted = add_reaction(session, post_id, user_id, reaction_type)
+    if not reacted:
+        remove_reaction(session, post_id, user_id, reaction_type)
+    session.commit()
+    return reacted, get_reaction_counts(session, [post_id])[post_id]
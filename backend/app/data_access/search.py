@@ -0,0 +1,154 @@
+from sqlalchemy import func, text
+from sqlmodel import Session, select
+
+from app.models.thread import Tag, Thread
+
+SEARCH_CONFIG = "vietnamese_unaccent"
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=30, MinWords=10"
+
+
+def encode_cursor(rank: float, row_id: int) -> str:
+    return f"{rank!r}:{row_id}"
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    rank, row_id = cursor.split(":")
+    return float(rank), int(row_id)
+
+
+def _thread_filters(category_id: int | None, tag_id: int | None, thread_id_column: str, params: dict) -> str:
+    conditions = []
+    if category_id is not None:
+        conditions.append("thread.category_id = :category_id")
+        params["category_id"] = category_id
+    if tag_id is not None:
+        conditions.append(
+            f"EXISTS (SELECT 1 FROM threadtag WHERE threadtag.thread_id = {thread_id_column} AND threadtag.tag_id = :tag_id)"
+        )
+        params["tag_id"] = tag_id
+    return "".join(f" AND {condition}" for condition in conditions)
+
+
+def _cursor_filter(cursor: str | None, params: dict) -> str:
+    if cursor is None:
+        return ""
+    # Keyset paging on (rank, id): ts_rank is a real, so compare against the cursor as one too
+    params["cursor_rank"], params["cursor_id"] = decode_cursor(cursor)
+    return " AND (rank, id) < (CAST(:cursor_rank AS real), :cursor_id)"
+
+
+def search_posts(
+    session: Session,
+    q: str,
+    *,
+    category_id: int | None = None,
+    tag_id: int | None = None,
+    cursor: str | None = None,
+    limit: int = 20,
+) -> list[dict]:
+    """
+    Rank posts matching ``q`` (websearch syntax) through the GIN index on post.search_vector.
+    Headlines are only built for the returned page, since ts_headline re-parses the content.
+    """
+    params = {"q": q, "limit": limit}
+    filters = _thread_filters(category_id, tag_id, "post.thread_id", params)
+    page_filter = _cursor_filter(cursor, params)
+    query = f"""
+        WITH query AS (
+            SELECT websearch_to_tsquery('{SEARCH_CONFIG}', :q) AS tsq
+        ),
+        matches AS (
+            SELECT post.id, post.thread_id, ts_rank(post.search_vector, query.tsq) AS rank
+            FROM post
+            JOIN thread ON thread.id = post.thread_id
+            CROSS JOIN query
+            WHERE post.search_vector @@ query.tsq{filters}
+        ),
+        page AS (
+            SELECT id, thread_id, rank FROM matches
+            WHERE true{page_filter}
+            ORDER BY rank DESC, id DESC
+            LIMIT :limit
+        )
+        SELECT page.id AS post_id, page.thread_id, thread.title AS thread_title, post.user_id, post.created_at,
+               page.rank, ts_headline('{SEARCH_CONFIG}', post.content, query.tsq, '{HEADLINE_OPTIONS}') AS headline
+        FROM page
+        JOIN post ON post.id = page.id
+        JOIN thread ON thread.id = page.thread_id
+        CROSS JOIN query
+        ORDER BY page.rank DESC, page.id DESC
+    """
+    return [dict(row) for row in session.execute(text(query), params).mappings().all()]
+
+
+def search_threads(
+    session: Session,
+    q: str,
+    *,
+    category_id: int | None = None,
+    tag_id: int | None = None,
+    cursor: str | None = None,
+    limit: int = 20,
+) -> list[dict]:
+    """Rank threads whose title matches ``q`` through the GIN index on thread.search_vector."""
+    params = {"q": q, "limit": limit}
+    filters = _thread_filters(category_id, tag_id, "thread.id", params)
+    page_filter = _cursor_filter(cursor, params)
+    query = f"""
+        WITH query AS (
+            SELECT websearch_to_tsquery('{SEARCH_CONFIG}', :q) AS tsq
+        ),
+        matches AS (
+            SELECT thread.id, ts_rank(thread.search_vector, query.tsq) AS rank
+            FROM thread
+            CROSS JOIN query
+            WHERE thread.search_vector @@ query.tsq{filters}
+        ),
+        page AS (
+            SELECT id, rank FROM matches
+            WHERE true{page_filter}
+            ORDER BY rank DESC, id DESC
+            LIMIT :limit
+        )
+        SELECT NULL::bigint AS post_id, thread.id AS thread_id, thread.title AS thread_title, thread.user_id,
+               thread.created_at, page.rank,
+               ts_headline('{SEARCH_CONFIG}', thread.title, query.tsq, '{HEADLINE_OPTIONS}') AS headline
+        FROM page
+        JOIN thread ON thread.id = page.id
+        CROSS JOIN query
+        ORDER BY page.rank DESC, page.id DESC
+    """
+    return [dict(row) for row in session.execute(text(query), params).mappings().all()]
+
+
+# "!" rather than a backslash, whose quoting in an ESCAPE literal depends on server settings
+LIKE_ESCAPE = "!"
+
+
+def _escape_like(q: str) -> str:
+    return q.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+
+def suggest_threads(session: Session, q: str, limit: int = 10) -> list[tuple[int, str]]:
+    """Titles containing ``q`` (served by the pg_trgm GIN index), prefix matches and closest ones first."""
+    query = (
+        select(Thread.id, Thread.title)
+        .where(Thread.title.ilike(f"%{_escape_like(q)}%", escape=LIKE_ESCAPE))
+        .order_by(
+            Thread.title.ilike(f"{_escape_like(q)}%", escape=LIKE_ESCAPE).desc(),
+            func.similarity(Thread.title, q).desc(),
+            Thread.id.desc(),
+        )
+        .limit(limit)
+    )
+    return [tuple(row) for row in session.exec(query).all()]
+
+
+def suggest_tags(session: Session, q: str, limit: int = 10) -> list[tuple[int, str]]:
+    query = (
+        select(Tag.id, Tag.name)
+        .where(Tag.name.ilike(f"%{_escape_like(q)}%", escape=LIKE_ESCAPE))
+        .order_by(func.similarity(Tag.name, q).desc(), Tag.id)
+        .limit(limit)
+    )
+    return [tuple(row) for row in session.exec(query).all()]
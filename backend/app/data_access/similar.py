@@ -0,0 +1,125 @@
+import asyncio
+import json
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.neo4j import neo4j_conn
+from app.core.redis import redis_conn
+from app.data_access import neo4j
+from app.data_access.tag_index import TagIndex
+
+SIMILAR_THREADS_KEY_PREFIX = "similar_threads:"
+# Keep more than the 5 shown, so deleted threads don't leave the list short
+SIMILAR_THREADS_K = 10
+# Lists are rebuilt on tag changes; the TTL only bounds how long an orphaned key lives
+SIMILAR_THREADS_TTL = 24 * 60 * 60  # 1 day in seconds
+RECOMPUTE_CHUNK_SIZE = 500
+
+# Top-K threads sharing the most tags with each given thread, ties broken by recent activity.
+# Rows use the same {threadId, sharedTags} shape as the Neo4j query.
+SIMILAR_THREADS_QUERY = """
+    WITH shared AS (
+        SELECT a.thread_id, b.thread_id AS other_id, COUNT(*) AS shared_tags
+        FROM threadtag AS a
+        JOIN threadtag AS b ON b.tag_id = a.tag_id AND b.thread_id <> a.thread_id
+        WHERE a.thread_id = ANY(:thread_ids)
+        GROUP BY a.thread_id, b.thread_id
+    ),
+    ranked AS (
+        SELECT shared.thread_id, shared.other_id, shared.shared_tags,
+               row_number() OVER (
+                   PARTITION BY shared.thread_id ORDER BY shared.shared_tags DESC, thread.updated_at DESC
+               ) AS rank
+        FROM shared
+        JOIN thread ON thread.id = shared.other_id
+    )
+    SELECT thread_id, other_id, shared_tags FROM ranked WHERE rank <= :k ORDER BY thread_id, rank
+"""
+
+# Threads whose similar lists can change when the tags of :thread_id change
+AFFECTED_THREADS_QUERY = """
+    SELECT DISTINCT b.thread_id
+    FROM threadtag AS a
+    JOIN threadtag AS b ON b.tag_id = a.tag_id
+    WHERE a.thread_id = :thread_id
+"""
+
+# Threads whose similar lists can change when :tag_ids were added to a thread: only scores
+# against threads holding one of those tags move
+TAGGED_THREADS_QUERY = "SELECT DISTINCT thread_id FROM threadtag WHERE tag_id = ANY(:tag_ids)"
+
+
+# One per process (API worker or Celery worker), only used by the memory backend
+tag_index = TagIndex(max_age=settings.TAG_INDEX_MAX_AGE)
+
+
+def _key(thread_id: int) -> str:
+    return f"{SIMILAR_THREADS_KEY_PREFIX}{thread_id}"
+
+
+def compute_similar_threads(session: Session, thread_ids: list[int], k: int = SIMILAR_THREADS_K) -> dict[int, list[dict]]:
+    """
+    Top-k {threadId, sharedTags} rows per thread from the configured SIMILAR_THREADS_BACKEND.
+    Every backend blocks (Postgres, the index reload, the sync Neo4j driver); the API uses
+    compute_similar_threads_async instead.
+    """
+    if settings.SIMILAR_THREADS_BACKEND == "memory":
+        return tag_index.similar_threads(session, thread_ids, k, idf=settings.SIMILAR_THREADS_IDF)
+    if settings.SIMILAR_THREADS_BACKEND == "neo4j":
+        with neo4j_conn.driver.session() as neo4j_session:
+            similar = neo4j.get_similar_threads_many(neo4j_session, thread_ids, limit=k)
+        return {thread_id: similar.get(thread_id, []) for thread_id in thread_ids}
+    similar: dict[int, list[dict]] = {thread_id: [] for thread_id in thread_ids}
+    rows = session.execute(text(SIMILAR_THREADS_QUERY), {"thread_ids": thread_ids, "k": k}).all()
+    for thread_id, other_id, shared_tags in rows:
+        similar[thread_id].append({"threadId": other_id, "sharedTags": shared_tags})
+    return similar
+
+
+async def compute_similar_threads_async(bind, thread_ids: list[int], k: int = SIMILAR_THREADS_K) -> dict[int, list[dict]]:
+    """Request path variant: Neo4j through the async driver, the other backends in a worker thread."""
+    if settings.SIMILAR_THREADS_BACKEND == "neo4j":
+        async with neo4j_conn.get_session() as neo4j_session:
+            similar = await neo4j.get_similar_threads_many_async(neo4j_session, thread_ids, limit=k)
+        return {thread_id: similar.get(thread_id, []) for thread_id in thread_ids}
+
+    def run():
+        with Session(bind) as session:
+            return compute_similar_threads(session, thread_ids, k)
+    return await asyncio.to_thread(run)
+
+
+def get_affected_threads(session: Session, thread_id: int, tag_ids: list[int] | None = None) -> list[int]:
+    """Threads to re-rank after tags were added to thread_id; all of its tags when tag_ids isn't known."""
+    if tag_ids:
+        affected = {row[0] for row in session.execute(text(TAGGED_THREADS_QUERY), {"tag_ids": tag_ids}).all()}
+    else:
+        affected = {row[0] for row in session.execute(text(AFFECTED_THREADS_QUERY), {"thread_id": thread_id}).all()}
+    affected.add(thread_id)
+    return sorted(affected)
+
+
+async def evict_similar_threads(thread_id: int) -> None:
+    await redis_conn.remove(_key(thread_id))
+
+
+async def get_cached_similar_threads(thread_id: int) -> list[dict] | None:
+    data = await redis_conn.get(_key(thread_id))
+    return json.loads(data) if data is not None else None
+
+
+async def get_cached_similar_threads_many(thread_ids: list[int]) -> dict[int, list[dict] | None]:
+    cached = await redis_conn.mget([_key(thread_id) for thread_id in thread_ids])
+    return {
+        thread_id: json.loads(data) if data is not None else None
+        for thread_id, data in zip(thread_ids, cached)
+    }
+
+
+async def cache_similar_threads(similar: dict[int, list[dict]], redis=redis_conn) -> None:
+    await redis.set_many(
+        {_key(thread_id): json.dumps(rows) for thread_id, rows in similar.items()},
+        ttl=SIMILAR_THREADS_TTL,
+    )
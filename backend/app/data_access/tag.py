@@ -0,0 +1,10 @@
+from sqlmodel import Session, select
+
+from app.models.thread import Tag, ThreadTag
+
+THREAD_TAGS_KEY_PREFIX = "thread_tags:"
+TAGS_CACHE_TTL = 6 * 60 * 60  # 6 hours in seconds
+
+def get_tags_for_thread(db: Session, thread_id: int) -> list[Tag]:
+    statement = select(Tag).join(ThreadTag, ThreadTag.tag_id == Tag.id).where(ThreadTag.thread_id == thread_id)
+    return db.exec(statement).all()
@@ -0,0 +1,125 @@
+import bisect
+import math
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+try:
+    import numpy as np
+except ImportError:  # optional, install the "similarity" extra for vectorized scoring
+    np = None
+
+LOAD_QUERY = "SELECT tag_id, thread_id FROM threadtag ORDER BY tag_id, thread_id"
+THREAD_TAGS_QUERY = "SELECT thread_id, tag_id FROM threadtag WHERE thread_id = ANY(:thread_ids)"
+
+
+class TagIndex:
+    """
+    In-process inverted index of threadtag: for every tag, the sorted ids of its threads
+    (a NumPy int64 array when NumPy is installed, a list otherwise).
+
+    Similar threads are scored from the postings of a thread's tags, by shared-tag count or by
+    IDF-weighted overlap, so rare shared tags count more than popular ones. The index is
+    reloaded from Postgres every ``max_age`` seconds and patched in between with add_thread_tags.
+    """
+
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self._postings: dict[int, object] = {}
+        self._thread_count = 0
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self, session: Session) -> None:
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.max_age:
+            return
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.max_age:
+                return
+            postings: dict[int, list[int]] = {}
+            threads = set()
+            for tag_id, thread_id in session.execute(text(LOAD_QUERY)):
+                postings.setdefault(tag_id, []).append(thread_id)
+                threads.add(thread_id)
+            self._postings = {tag_id: self._to_postings(ids) for tag_id, ids in postings.items()}
+            self._thread_count = len(threads)
+            self._loaded_at = time.monotonic()
+
+    @staticmethod
+    def _to_postings(sorted_ids: list[int]):
+        return np.asarray(sorted_ids, dtype=np.int64) if np is not None else sorted_ids
+
+    def add_thread_tags(self, thread_id: int, tag_ids: list[int]) -> None:
+        """Patch the index after tags were added to a thread, until the next full reload."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            is_new_thread = True
+            for tag_id in set(tag_ids):
+                ids = self._postings.get(tag_id)
+                if np is not None:
+                    ids = np.empty(0, dtype=np.int64) if ids is None else ids
+                    position = int(np.searchsorted(ids, thread_id))
+                    present = position < len(ids) and ids[position] == thread_id
+                    if not present:
+                        ids = np.insert(ids, position, thread_id)
+                else:
+                    ids = [] if ids is None else ids
+                    position = bisect.bisect_left(ids, thread_id)
+                    present = position < len(ids) and ids[position] == thread_id
+                    if not present:
+                        ids.insert(position, thread_id)
+                if present:
+                    is_new_thread = False
+                self._postings[tag_id] = ids
+            if is_new_thread:
+                self._thread_count += 1
+
+    def _idf(self, tag_id: int) -> float:
+        return math.log(1 + self._thread_count / max(len(self._postings.get(tag_id, ())), 1))
+
+    def similar_threads(self, session: Session, thread_ids: list[int], k: int, idf: bool = False) -> dict[int, list[dict]]:
+        """Top-k {threadId, sharedTags} rows per thread, highest score first, newer threads first on ties."""
+        self._ensure_loaded(session)
+        thread_tags: dict[int, list[int]] = {thread_id: [] for thread_id in thread_ids}
+        for thread_id, tag_id in session.execute(text(THREAD_TAGS_QUERY), {"thread_ids": thread_ids}):
+            thread_tags[thread_id].append(tag_id)
+        postings = self._postings
+        score = self._score_numpy if np is not None else self._score_python
+        return {
+            thread_id: score(thread_id, [tag_id for tag_id in tags if tag_id in postings], k, idf)
+            for thread_id, tags in thread_tags.items()
+        }
+
+    def _score_numpy(self, thread_id: int, tag_ids: list[int], k: int, idf: bool) -> list[dict]:
+        if not tag_ids:
+            return []
+        lists = [self._postings[tag_id] for tag_id in tag_ids]
+        candidates = np.concatenate(lists)
+        if idf:
+            weights = np.concatenate([np.full(len(ids), self._idf(tag_id)) for tag_id, ids in zip(tag_ids, lists)])
+        else:
+            weights = None
+        ids, inverse = np.unique(candidates, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        keep = ids != thread_id
+        ids, scores = ids[keep], scores[keep]
+        # Highest score first, then newest thread
+        order = np.lexsort((-ids, -scores))[:k]
+        return [
+            {"threadId": int(ids[i]), "sharedTags": float(scores[i]) if idf else int(scores[i])}
+            for i in order
+        ]
+
+    def _score_python(self, thread_id: int, tag_ids: list[int], k: int, idf: bool) -> list[dict]:
+        scores: Counter = Counter()
+        for tag_id in tag_ids:
+            weight = self._idf(tag_id) if idf else 1
+            for other_id in self._postings[tag_id]:
+                if other_id != thread_id:
+                    scores[other_id] += weight
+        ranked = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)[:k]
+        return [{"threadId": other_id, "sharedTags": score} for other_id, score in ranked]
@@ -1,14 +1,67 @@
+from collections.abc import Iterable
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Float, Integer, column, func, insert, literal, null, values
 from sqlmodel import Session, select
 
-from app.models.thread import Thread, ThreadCreate
-from app.api.deps import CurrentUser
+from app.models.category import Category
+from app.models.post import Post, PostResponse
+from app.models.thread import Thread, ThreadCreate, ThreadResponse
+from app.core.cache import LocalTTLCache
+from app.data_access import counter
+
+# Thread cards shown in similar-thread lists; counters may lag by up to the TTL
+THREAD_CACHE = LocalTTLCache(maxsize=10_000, ttl=30)
+
+def create_thread(db: Session, thread: ThreadCreate, user_id: int) -> tuple[ThreadResponse, PostResponse | None] | None:
+    """
+    Create a thread, its first post and the category counter bump in a single transaction.
+
+    The category check is folded into the thread INSERT ... SELECT, so nothing is written
+    and None is returned when the category doesn't exist or isn't a second level category.
+    The first post's id is drawn from its sequence in that same INSERT, so the thread row is
+    written with its last post summary and never updated. The result is built from the
+    RETURNING rows before the commit expires them.
+    """
+    now = datetime.now()
+    has_post = thread.content is not None
+    thread_values = select(
+        literal(thread.title),
+        Category.id,
+        literal(user_id, BigInteger),
+        literal(1 if has_post else 0, Integer),
+        func.nextval(func.pg_get_serial_sequence("post", "id")) if has_post else null(),
+        literal(user_id, BigInteger) if has_post else null(),
+        literal(now, DateTime) if has_post else null(),
+        literal(now, DateTime),
+        literal(now, DateTime),
+    ).where(Category.id == thread.category_id, Category.level == 2)
+    insert_thread = (
+        insert(Thread)
+        .from_select(
+            ["title", "category_id", "user_id", "children_count", "last_post_id", "last_post_user_id", "last_post_at", "updated_at", "created_at"],
+            thread_values,
+        )
+        .returning(Thread)
+    )
+    db_thread = db.execute(insert_thread).scalars().first()
+    if db_thread is None:
+        db.rollback()
+        return None
+    created_thread = ThreadResponse.model_validate(db_thread)
 
-def create_thread(db: Session, thread: ThreadCreate, user: CurrentUser) -> Thread:
-    db_thread = Thread(**thread.model_dump(), user_id=user.id)
-    db.add(db_thread)   
+    first_post = None
+    if has_post:
+        insert_post = (
+            insert(Post)
+            .values(id=db_thread.last_post_id, thread_id=db_thread.id, user_id=user_id, content=thread.content, quote_ids=[], created_at=now, updated_at=now)
+            .returning(Post)
+        )
+        first_post = PostResponse.model_validate(db.execute(insert_post).scalars().one())
+
+    counter.record_delta(db, counter.CATEGORY, db_thread.category_id)
     db.commit()
-    db.refresh(db_thread)
-    return db_thread
+    return created_thread, first_post
 
 def get_thread(db: Session, thread_id: int) -> Thread | None:
     return db.exec(select(Thread).where(Thread.id == thread_id)).first()
@@ -25,4 +78,64 @@ def get_thread_by_level(db: Session, level: int) -> list[Thread]:
 
 def get_parent_thread(db: Session, thread_id: int) -> Thread | None:
     return db.exec(select(Thread).where(Thread.id == thread_id)).first()  
-    
\ No newline at end of file
+    
+
+def _cache_threads(threads: list[Thread]) -> list[ThreadResponse]:
+    responses = [ThreadResponse.model_validate(thread) for thread in threads]
+    for response in responses:
+        THREAD_CACHE.set(response.id, response)
+    return responses
+
+
+def get_cached_threads(db: Session, thread_ids: set[int]) -> dict[int, ThreadResponse]:
+    """Thread details from the in-process thread cache, with the misses fetched in one query."""
+    threads = {}
+    for thread_id in thread_ids:
+        cached = THREAD_CACHE.get(thread_id)
+        if cached is not None:
+            threads[thread_id] = cached
+    missing = [thread_id for thread_id in thread_ids if thread_id not in threads]
+    if missing:
+        fetched = db.exec(select(Thread).where(Thread.id.in_(missing))).all()
+        threads.update((thread.id, thread) for thread in _cache_threads(fetched))
+    return threads
+
+
+def _rank(threads: Iterable[ThreadResponse], scores: dict[int, float], limit: int) -> list[ThreadResponse]:
+    return sorted(threads, key=lambda thread: (scores[thread.id], thread.updated_at), reverse=True)[:limit]
+
+
+def rank_similar_threads(db: Session, similar: list[dict], limit: int = 5) -> list[ThreadResponse]:
+    """
+    Hydrate similar-thread rows ({threadId, sharedTags}), ordered by shared tags and then by
+    most recently updated. Served from the thread cache when every candidate is in it,
+    otherwise with one query ordered by a VALUES-joined score.
+    """
+    scores = {row["threadId"]: row["sharedTags"] for row in similar}
+    if not scores:
+        return []
+    cached = [THREAD_CACHE.get(thread_id) for thread_id in scores]
+    if all(thread is not None for thread in cached):
+        return _rank(cached, scores, limit)
+
+    similar_scores = values(
+        column("id", BigInteger), column("score", Float), name="similar_scores"
+    ).data(list(scores.items()))
+    statement = (
+        select(Thread)
+        .join(similar_scores, similar_scores.c.id == Thread.id)
+        .order_by(similar_scores.c.score.desc(), Thread.updated_at.desc())
+    )
+    # The candidate list is short (SIMILAR_THREADS_K), so all of it is fetched to fill the cache
+    return _cache_threads(db.exec(statement).all())[:limit]
+
+
+def rank_similar_threads_many(db: Session, similar: dict[int, list[dict]], limit: int = 5) -> dict[int, list[ThreadResponse]]:
+    """rank_similar_threads for many threads at once, hydrating every candidate in one query."""
+    candidate_ids = {row["threadId"] for rows in similar.values() for row in rows}
+    threads = get_cached_threads(db, candidate_ids)
+    ranked = {}
+    for thread_id, rows in similar.items():
+        scores = {row["threadId"]: row["sharedTags"] for row in rows}
+        ranked[thread_id] = _rank((threads[id] for id in scores if id in threads), scores, limit)
+    return ranked
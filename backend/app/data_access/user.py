@@ -0,0 +1,79 @@
+import asyncio
+
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session, select
+
+from app.core.cache import LocalTTLCache
+from app.core.redis import redis_conn
+from app.models.user import User, UserBase, UserPublic
+
+USER_PROFILE_KEY_PREFIX = "user_profile:"
+USER_PROFILE_TTL = 60 * 60  # 1 hour in seconds
+
+PRINCIPAL_KEY_PREFIX = "principal:"
+PRINCIPAL_TTL = 5 * 60  # 5 minutes in seconds
+# Other workers' copies can't be invalidated, so a ban reaches them within this many seconds
+_local_principals = LocalTTLCache(maxsize=10_000, ttl=5)
+
+class _CachedPrincipal(UserBase):
+    # Everything get_current_user and the handlers read, but never the password hash
+    id: int
+
+def _profile_key(user_id: int) -> str:
+    return f"{USER_PROFILE_KEY_PREFIX}{user_id}"
+
+def _load_profiles(session: Session, user_ids: list[int]) -> dict[int, UserPublic]:
+    users = session.exec(select(User).where(User.id.in_(user_ids))).all()
+    return {user.id: UserPublic.model_validate(user) for user in users}
+
+async def get_public_profiles(session: Session, user_ids: list[int]) -> list[UserPublic]:
+    """
+    Public profiles in the order of user_ids (duplicates and unknown ids dropped), served from
+    the Redis profile cache with one MGET. Misses are filled with a single IN query and cached.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return []
+    cached = await redis_conn.mget([_profile_key(user_id) for user_id in user_ids])
+    profiles = {
+        user_id: UserPublic.model_validate_json(data)
+        for user_id, data in zip(user_ids, cached)
+        if data is not None
+    }
+    missing = [user_id for user_id in user_ids if user_id not in profiles]
+    if missing:
+        fresh = await asyncio.to_thread(_load_profiles, session, missing)
+        profiles.update(fresh)
+        if fresh:
+            await redis_conn.set_many(
+                {_profile_key(user_id): profile.model_dump_json() for user_id, profile in fresh.items()},
+                ttl=USER_PROFILE_TTL,
+            )
+    return [profiles[user_id] for user_id in user_ids if user_id in profiles]
+
+async def get_cached_principal(session: Session, user_id: int) -> User | None:
+    """
+    The authenticated user from the in-process or Redis principal cache, attached to session
+    without a query. hashed_password isn't cached and is loaded on first access.
+    """
+    data = _local_principals.get(user_id)
+    if data is None:
+        data = await redis_conn.get(f"{PRINCIPAL_KEY_PREFIX}{user_id}")
+        if data is None:
+            return None
+        _local_principals.set(user_id, data)
+    user = User(**_CachedPrincipal.model_validate_json(data).model_dump())
+    make_transient_to_detached(user)
+    session.add(user)
+    return user
+
+async def cache_principal(user: User) -> None:
+    data = _CachedPrincipal.model_validate(user).model_dump_json()
+    _local_principals.set(user.id, data)
+    await redis_conn.set(f"{PRINCIPAL_KEY_PREFIX}{user.id}", data, ttl=PRINCIPAL_TTL)
+
+async def invalidate_user(user_id: int) -> None:
+    """Drop the cached profile and principal after a profile, ban, level, password change or delete."""
+    _local_principals.delete(user_id)
+    await redis_conn.remove(_profile_key(user_id))
+    await redis_conn.remove(f"{PRINCIPAL_KEY_PREFIX}{user_id}")
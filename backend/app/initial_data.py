@@ -84,6 +84,8 @@ async def main() -> None:
     except Exception as e:
         logger.error(f"Neo4j connection test failed: {e}")
         # Handle or raise if needed
+    finally:
+        await neo4j_conn.aclose()
 
     # Test Redis (asynchronous)
     await init_redis()
@@ -1,12 +1,17 @@
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from neo4j.exceptions import DriverError, Neo4jError
 
 from app.api.main import api_router
 from app.core.config import settings
+from app.core.neo4j import neo4j_conn
 from app.core.redis import redis_conn
+from app.core.security import PasswordHashPoolBusy, password_hash_pool
+from app.data_access import neo4j
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -22,6 +27,14 @@ async def lifespan(app: FastAPI):
         print("Redis connection established")
     except Exception as e:
         print(f"Error connecting to Redis: {e}")
+    # The graph schema is created by backend_pre_start; only report what is missing here
+    try:
+        async with neo4j_conn.get_session() as neo4j_session:
+            missing = await neo4j.missing_graph_indexes_async(neo4j_session)
+        if missing:
+            print(f"Neo4j indexes missing or not online: {', '.join(missing)}")
+    except (Neo4jError, DriverError) as e:
+        print(f"Error checking Neo4j indexes: {e}")
     yield
     # Close Redis connection on shutdown
     try:
@@ -29,6 +42,8 @@ async def lifespan(app: FastAPI):
         await redis_conn.close()
     except Exception as e:
         print(f"Error closing Redis connection: {e}")
+    password_hash_pool.shutdown()
+    await neo4j_conn.aclose()
 
 
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
@@ -51,4 +66,14 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
+
+@app.exception_handler(PasswordHashPoolBusy)
+async def password_hash_pool_busy_handler(request: Request, exc: PasswordHashPoolBusy) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many login attempts in progress, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -0,0 +1,15 @@
+from sqlmodel import Field, SQLModel
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, Index
+
+class CounterDelta(SQLModel, table=True):
+    # Append-only increments for thread/category children_count. Writers only insert here,
+    # so they never queue on the parent row lock; a periodic task folds them into the parent.
+    __table_args__ = (Index("ix_counterdelta_entity", "entity_type", "entity_id"),)
+
+    id: int = Field(default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True))
+    entity_type: str
+    entity_id: int = Field(sa_type=BigInteger)
+    delta: int = Field(default=1)
+
+    created_at: datetime = Field(default_factory=datetime.now)
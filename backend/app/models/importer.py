@@ -0,0 +1,14 @@
+from sqlmodel import Field, SQLModel
+from datetime import datetime
+from sqlalchemy import BigInteger
+
+class ImportCheckpoint(SQLModel, table=True):
+    # One row per crawled data file, written in the same transaction as its thread and posts,
+    # so a rerun of the importer skips exactly the files that were fully imported.
+    __tablename__ = 'import_checkpoint'
+
+    path: str = Field(primary_key=True)
+    thread_id: int = Field(sa_type=BigInteger)
+    posts: int
+
+    finished_at: datetime = Field(default_factory=datetime.now)
@@ -0,0 +1,15 @@
+from sqlmodel import Field, SQLModel
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, Text
+from sqlalchemy.dialects.postgresql import ARRAY
+
+class GraphOutbox(SQLModel, table=True):
+    # Graph changes written in the same transaction as the threadtag rows they mirror;
+    # a periodic task applies them to Neo4j and deletes them, in id order.
+    __tablename__ = 'graph_outbox'
+
+    id: int = Field(default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True))
+    thread_id: int = Field(sa_type=BigInteger)
+    tag_names: list[str] = Field(sa_type=ARRAY(Text), default_factory=list)
+
+    created_at: datetime = Field(default_factory=datetime.now)
@@ -1,9 +1,16 @@
 from sqlmodel import Field, SQLModel
 from datetime import datetime
 from sqlalchemy.dialects.postgresql import ARRAY
-from sqlalchemy import Integer, BigInteger, Column
+from sqlalchemy import Integer, BigInteger, Column, Index, UniqueConstraint
 
 class Post(SQLModel, table=True):
+    # Posts are read per thread in id order, and the latest post of a thread is looked up by it.
+    # The GIN index on quote_ids answers "who quoted this post" with quote_ids @> ARRAY[id].
+    __table_args__ = (
+        Index("ix_post_thread_id_id", "thread_id", "id"),
+        Index("ix_post_quote_ids", "quote_ids", postgresql_using="gin"),
+    )
+
     id: int = Field(default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True))
     thread_id: int = Field(foreign_key="thread.id", sa_type=BigInteger)
     user_id: int = Field(foreign_key="user.id", sa_type=BigInteger)
@@ -16,6 +23,9 @@ class Post(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=datetime.now)
 
 class PostReaction(SQLModel, table=True):
+    # A user reacts at most once per type on a post
+    __table_args__ = (UniqueConstraint("post_id", "user_id", "reaction_type", name="uq_postreaction_post_user_type"),)
+
     id: int = Field(default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True))
     post_id: int = Field(foreign_key="post.id", index=True, sa_type=BigInteger)
     user_id: int = Field(foreign_key="user.id", sa_type=BigInteger)
@@ -23,10 +33,24 @@ class PostReaction(SQLModel, table=True):
 
     created_at: datetime = Field(default_factory=datetime.now)
 
+class PostReactionCount(SQLModel, table=True):
+    # Aggregate of postreaction, maintained with every reaction insert/delete
+    __tablename__ = 'post_reaction_count'
+    post_id: int = Field(foreign_key="post.id", sa_type=BigInteger, primary_key=True)
+    reaction_type: int = Field(primary_key=True)
+    count: int = Field(default=0)
+
 class PostCreate(SQLModel):
     content: str
     quote_ids: list[int] = Field(default_factory=list)
 
+class QuotedPost(SQLModel):
+    id: int
+    thread_id: int
+    user_id: int
+    excerpt: str
+    created_at: datetime
+
 class PostResponse(SQLModel):
     id: int
     thread_id: int
@@ -35,3 +59,5 @@ class PostResponse(SQLModel):
     quote_ids: list[int]
     created_at: datetime
     updated_at: datetime
+    # Only filled when the caller asks for include_quotes; quoted posts that were deleted are left out
+    quotes: list[QuotedPost] | None = None
@@ -1,8 +1,15 @@
 from sqlmodel import Field, SQLModel
 from datetime import datetime
-from sqlalchemy import BigInteger, Column
+from sqlalchemy import BigInteger, Column, Index
 
 class Thread(SQLModel, table=True):
+    __table_args__ = (
+        # Category pages list threads by category ordered by updated_at
+        Index("ix_thread_category_id_updated_at", "category_id", "updated_at"),
+        # Substring / fuzzy title matching for autocomplete
+        Index("ix_thread_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
+
     id: int = Field(default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True))
     title: str 
 
@@ -11,6 +18,11 @@ class Thread(SQLModel, table=True):
     user_id: int = Field(foreign_key="user.id", sa_type=BigInteger)
     children_count: int = Field(default=0)
 
+    # Denormalized last post summary so listings don't need to fetch posts per thread
+    last_post_id: int | None = Field(default=None, sa_type=BigInteger)
+    last_post_user_id: int | None = Field(default=None, sa_type=BigInteger)
+    last_post_at: datetime | None = None
+
     updated_at: datetime = Field(default_factory=datetime.now, index=True)
     created_at: datetime = Field(default_factory=datetime.now)
 
@@ -24,8 +36,23 @@ class ThreadCreate(SQLModel):
     category_id: int | None = None
     content: str | None = None
 
+class ThreadResponse(SQLModel):
+    id: int
+    title: str
+    user_id: int
+    category_id: int | None
+    children_count: int
+    updated_at: datetime
+    last_post_id: int | None = None
+    last_post_user_id: int | None = None
+    last_post_at: datetime | None = None
+
 
 class Tag(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_tag_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
+
     id: int = Field(default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True))
     name: str = Field(index=True)
     description: str | None = None
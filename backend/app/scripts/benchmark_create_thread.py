@@ -0,0 +1,99 @@
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path to allow imports from app
+project_root = Path(__file__).parent.parent.parent.absolute()
+sys.path.append(str(project_root))
+
+from sqlmodel import Session, delete, select, update
+
+from app.core.db import engine
+from app.data_access import counter
+from app.data_access import thread as thread_da
+from app.models.category import Category
+from app.models.counter import CounterDelta
+from app.models.post import Post
+from app.models.thread import Thread, ThreadCreate
+from app.models.user import User
+
+ITERATIONS = 500
+TITLE_PREFIX = "benchmark-create-thread"
+SCRATCH_CATEGORY_TITLE = "benchmark-create-thread (scratch)"
+
+
+def create_thread_three_commits(db: Session, thread: ThreadCreate, user_id: int) -> None:
+    """The previous write path: thread, counter and first post each in their own commit."""
+    category = db.exec(select(Category).where(Category.id == thread.category_id)).first()
+    db_thread = Thread(**thread.model_dump(), user_id=user_id, children_count=1)
+    db.add(db_thread)
+    db.commit()
+    db.exec(update(Category).where(Category.id == category.id).values(children_count=Category.children_count + 1))
+    db.commit()
+    db.add(Post(thread_id=db_thread.id, user_id=user_id, content=thread.content))
+    db.commit()
+
+
+def create_thread_single_transaction(db: Session, thread: ThreadCreate, user_id: int) -> None:
+    thread_da.create_thread(db, thread, user_id)
+
+
+def run(name: str, create, commits_per_thread: int, category_id: int, user_id: int) -> None:
+    with Session(engine) as db:
+        started = time.perf_counter()
+        for i in range(ITERATIONS):
+            thread = ThreadCreate(title=f"{TITLE_PREFIX}-{name}-{i}", category_id=category_id, content="benchmark")
+            create(db, thread, user_id)
+        elapsed = time.perf_counter() - started
+    print(
+        f"{name:>20}: {ITERATIONS / elapsed:8.1f} threads/s, "
+        f"{ITERATIONS * commits_per_thread / elapsed:8.1f} commits/s, "
+        f"{elapsed / ITERATIONS * 1000:6.2f} ms/thread"
+    )
+
+
+def create_scratch_category(user_id: int) -> int:
+    # A second level category of its own, so the run never touches real listings or their counters
+    with Session(engine) as db:
+        category = Category(title=SCRATCH_CATEGORY_TITLE, level=2, user_id=user_id)
+        db.add(category)
+        db.commit()
+        return category.id
+
+
+def cleanup(category_id: int) -> None:
+    with Session(engine) as db:
+        thread_ids = select(Thread.id).where(Thread.category_id == category_id)
+        created = len(db.exec(thread_ids).all())
+        db.exec(delete(Post).where(Post.thread_id.in_(thread_ids)))
+        db.exec(delete(Thread).where(Thread.category_id == category_id))
+        # Deltas the fold task hasn't picked up yet; folded ones only ever touched this category
+        db.exec(
+            delete(CounterDelta).where(
+                CounterDelta.entity_type == counter.CATEGORY,
+                CounterDelta.entity_id == category_id,
+            )
+        )
+        db.exec(delete(Category).where(Category.id == category_id))
+        db.commit()
+    print(f"Removed {created} benchmark threads and the scratch category")
+
+
+def main():
+    with Session(engine) as db:
+        user = db.exec(select(User).where(User.level == 0)).first()
+    if user is None:
+        print("Need an admin user to run the benchmark")
+        return
+
+    category_id = create_scratch_category(user.id)
+    print(f"Creating {ITERATIONS} threads per write path in scratch category {category_id}...")
+    try:
+        run("three commits", create_thread_three_commits, 3, category_id, user.id)
+        run("single transaction", create_thread_single_transaction, 1, category_id, user.id)
+    finally:
+        cleanup(category_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path to allow imports from app
+project_root = Path(__file__).parent.parent.parent.absolute()
+sys.path.append(str(project_root))
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.data_access import search
+
+# Terms that show up in the imported lap-trinh-cntt / tuyen-dung-tim-viec threads
+QUERIES = [
+    "phỏng vấn",
+    "phong van",
+    "lương",
+    "kinh nghiệm làm việc",
+    "python OR java",
+    "tuyển dụng -intern",
+    "\"system design\"",
+    "offer",
+]
+RUNS_PER_QUERY = 20
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def benchmark(name: str, search_fn) -> None:
+    latencies = []
+    with Session(engine) as session:
+        for q in QUERIES:
+            # First run warms the cache and fetches a second page through the cursor
+            hits = search_fn(session, q, limit=20)
+            if len(hits) == 20:
+                last = hits[-1]
+                cursor = search.encode_cursor(last["rank"], last["post_id"] or last["thread_id"])
+                search_fn(session, q, cursor=cursor, limit=20)
+            for _ in range(RUNS_PER_QUERY):
+                started = time.perf_counter()
+                search_fn(session, q, limit=20)
+                latencies.append((time.perf_counter() - started) * 1000)
+            print(f"  {name} {q!r}: {len(hits)} hits on first page")
+
+    print(
+        f"{name}: {len(latencies)} queries, "
+        f"mean {statistics.mean(latencies):.1f} ms, p50 {percentile(latencies, 50):.1f} ms, "
+        f"p95 {percentile(latencies, 95):.1f} ms, p99 {percentile(latencies, 99):.1f} ms"
+    )
+
+
+def main():
+    benchmark("posts", search.search_posts)
+    benchmark("threads", search.search_threads)
+
+
+if __name__ == "__main__":
+    main()
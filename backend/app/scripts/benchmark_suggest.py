@@ -0,0 +1,76 @@
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path to allow imports from app
+project_root = Path(__file__).parent.parent.parent.absolute()
+sys.path.append(str(project_root))
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.api.routes.thread import SUGGEST_MIN_LENGTH
+from app.core.db import engine
+from app.data_access import search
+
+# What a user types on the way to terms of the imported lap-trinh-cntt / tuyen-dung-tim-viec threads
+TERMS = ["phỏng vấn", "lương", "tuyển dụng", "python", "kinh nghiệm", "offer"]
+RUNS_PER_QUERY = 50
+LIMIT = 8
+
+EXPLAIN_QUERY = "EXPLAIN SELECT id FROM thread WHERE title ILIKE :pattern"
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def uses_trigram_index(session: Session, q: str) -> bool:
+    plan = "\n".join(row[0] for row in session.execute(text(EXPLAIN_QUERY), {"pattern": f"%{q}%"}))
+    return "ix_thread_title_trgm" in plan
+
+
+def report(name: str, latencies: list[float]) -> None:
+    print(
+        f"{name}: {len(latencies)} queries, "
+        f"mean {statistics.mean(latencies):.1f} ms, p50 {percentile(latencies, 50):.1f} ms, "
+        f"p95 {percentile(latencies, 95):.1f} ms, p99 {percentile(latencies, 99):.1f} ms"
+    )
+
+
+def main():
+    """
+    Latency of the suggest queries (threads and tags, without the in-process cache) for every
+    prefix a user types, bucketed by prefix length. Prefixes shorter than SUGGEST_MIN_LENGTH are
+    measured too, to show the sequential scans the API now refuses to run.
+    """
+    by_length: dict[int, list[float]] = {}
+    with Session(engine) as session:
+        prefixes = sorted({term[:length] for term in TERMS for length in range(2, len(term) + 1)}, key=len)
+        for q in prefixes:
+            search.suggest_threads(session, q, LIMIT)
+            search.suggest_tags(session, q, LIMIT)
+            latencies = by_length.setdefault(len(q), [])
+            for _ in range(RUNS_PER_QUERY):
+                started = time.perf_counter()
+                search.suggest_threads(session, q, LIMIT)
+                search.suggest_tags(session, q, LIMIT)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        for length in (2, SUGGEST_MIN_LENGTH):
+            sample = next(q for q in prefixes if len(q) == length)
+            index = "trigram index" if uses_trigram_index(session, sample) else "sequential scan"
+            print(f"Plan for a {length} character prefix ({sample!r}): {index}")
+
+    for length, latencies in sorted(by_length.items()):
+        report(f"{length:>2} chars", latencies)
+    report(f">= {SUGGEST_MIN_LENGTH} chars", [
+        latency for length, latencies in by_length.items() if length >= SUGGEST_MIN_LENGTH for latency in latencies
+    ])
+
+
+if __name__ == "__main__":
+    main()
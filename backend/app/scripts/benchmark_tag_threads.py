@@ -0,0 +1,74 @@
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path to allow imports from app
+project_root = Path(__file__).parent.parent.parent.absolute()
+sys.path.append(str(project_root))
+
+from neo4j import Session as Neo4jSession
+
+from app.core.neo4j import neo4j_conn
+from app.data_access import neo4j as neo4j_da
+
+THREADS = 2000
+TAGS_PER_THREAD = 5
+TAG_POOL = 50
+# Graph-only fixtures: negative thread ids and prefixed tag names never collide with real data
+TAG_PREFIX = "benchmark-tag-"
+
+
+def fixtures() -> list[tuple[int, list[str]]]:
+    return [
+        (-thread_no, [f"{TAG_PREFIX}{(thread_no + i) % TAG_POOL}" for i in range(TAGS_PER_THREAD)])
+        for thread_no in range(1, THREADS + 1)
+    ]
+
+
+def tag_one_by_one(neo4j_session: Neo4jSession, thread_tags: list[tuple[int, list[str]]]) -> None:
+    """The previous write path: one MERGE for the thread, then one per tag."""
+    for thread_id, tags in thread_tags:
+        neo4j_session.run("MERGE (t:Thread {id: $thread_id})", thread_id=thread_id).consume()
+        for tag_name in tags:
+            neo4j_session.run(
+                """
+                MATCH (t:Thread {id: $thread_id})
+                MERGE (tag:Tag {name: $tag_name})
+                MERGE (t)-[:HAS_TAG]->(tag)
+                """,
+                thread_id=thread_id,
+                tag_name=tag_name,
+            ).consume()
+
+
+def tag_unwind(neo4j_session: Neo4jSession, thread_tags: list[tuple[int, list[str]]]) -> None:
+    neo4j_da.add_tags_to_threads(thread_tags, neo4j_session=neo4j_session)
+
+
+def cleanup(neo4j_session: Neo4jSession) -> None:
+    neo4j_session.run("MATCH (t:Thread) WHERE t.id < 0 DETACH DELETE t").consume()
+    neo4j_session.run("MATCH (tag:Tag) WHERE tag.name STARTS WITH $prefix DETACH DELETE tag", prefix=TAG_PREFIX).consume()
+
+
+def run(name: str, tag, neo4j_session: Neo4jSession) -> None:
+    thread_tags = fixtures()
+    cleanup(neo4j_session)
+    started = time.perf_counter()
+    tag(neo4j_session, thread_tags)
+    elapsed = time.perf_counter() - started
+    print(f"{name:>12}: {THREADS / elapsed:8.1f} threads/s, {elapsed / THREADS * 1000:6.2f} ms/thread")
+
+
+def main():
+    print(f"Tagging {THREADS} threads with {TAGS_PER_THREAD} tags each per write path...")
+    with neo4j_conn.driver.session() as neo4j_session:
+        try:
+            run("one by one", tag_one_by_one, neo4j_session)
+            run("unwind", tag_unwind, neo4j_session)
+        finally:
+            cleanup(neo4j_session)
+    neo4j_conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to sys.path to allow imports from app
+project_root = Path(__file__).parent.parent.parent.absolute()
+sys.path.append(str(project_root))
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.core.security import UNUSABLE_PASSWORD_HASH, get_password_hash
+
+USERS = 100_000
+# Hashing per user costs ~250 ms each, so that mode runs on a sample and is extrapolated
+BCRYPT_SAMPLE = 200
+PASSWORD = "12345678"
+
+# Same columns and constraints as "user", dropped with the rolled back transaction. Defaults are
+# left out, since the id default would draw from user_id_seq, which a rollback doesn't give back;
+# ids are written explicitly instead.
+CREATE_BENCH_TABLE_SQL = 'CREATE TEMP TABLE bench_user (LIKE "user" INCLUDING ALL EXCLUDING DEFAULTS) ON COMMIT DROP'
+COPY_BENCH_SQL = (
+    "COPY bench_user (id, email, user_name, origin_user_id, hashed_password, level, is_banned, last_login, created_at, updated_at) "
+    "FROM STDIN"
+)
+
+
+def import_users(users: int, password_hash) -> float:
+    """Insert ``users`` fixture users the way the importer does, returns the elapsed seconds."""
+    started = time.perf_counter()
+    with Session(engine) as session:
+        session.execute(text(CREATE_BENCH_TABLE_SQL))
+        cursor = session.connection().connection.driver_connection.cursor()
+        now = datetime.now()
+        with cursor.copy(COPY_BENCH_SQL) as copy:
+            for origin_user_id in range(1, users + 1):
+                copy.write_row(
+                    (origin_user_id, f"{origin_user_id}@gmail.com", f"user {origin_user_id}", origin_user_id, password_hash(), 1, False, now, now, now)
+                )
+        elapsed = time.perf_counter() - started
+        session.rollback()
+    return elapsed
+
+
+def run(name: str, users: int, password_hash) -> float:
+    elapsed = import_users(users, password_hash)
+    projected = elapsed * USERS / users
+    note = f" (extrapolated from {users})" if users != USERS else ""
+    print(f"{name:>16}: {USERS / projected:10.1f} users/s, {projected:8.1f}s for {USERS} users{note}")
+    return projected
+
+
+def main():
+    print(f"Importing {USERS} users per password strategy...")
+    per_user = run("bcrypt per user", BCRYPT_SAMPLE, lambda: get_password_hash(PASSWORD))
+    shared_hash = get_password_hash(PASSWORD)
+    hash_once = run("hash once", USERS, lambda: shared_hash)
+    unusable = run("unusable", USERS, lambda: UNUSABLE_PASSWORD_HASH)
+    print(f"Speedup over bcrypt per user: hash once {per_user / hash_once:.0f}x, unusable {per_user / unusable:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import os
 import sys
 import random
+import time
 from pathlib import Path
 
 # Add project root to sys.path to allow imports from app
@@ -55,52 +56,48 @@ def main():
                 return
             print(f"Fetched {len(all_thread_ids)} thread IDs.")
 
-            # 3. Iterate and assign tags
+            # 3. Assign tags chunk by chunk: one SQL insert and one UNWIND graph write per chunk
             processed_threads = 0
+            started = time.perf_counter()
             # Use the driver directly to create a synchronous session
             with neo4j_conn.driver.session() as neo4j_session:
-                for thread_id in all_thread_ids:
-                    try:
+                for chunk_start in range(0, len(all_thread_ids), neo4j_da.TAG_BATCH_SIZE):
+                    chunk = all_thread_ids[chunk_start:chunk_start + neo4j_da.TAG_BATCH_SIZE]
+                    sql_insert_data = []
+                    thread_tags = []
+                    for thread_id in chunk:
                         # 4. Determine random number of tags and select them
                         num_tags_to_add = random.randint(MIN_TAGS_PER_THREAD, MAX_TAGS_PER_THREAD)
                         sample_size = min(num_tags_to_add, len(all_tags_list))
                         if sample_size == 0:
                             continue
-                            
-                        selected_tags = random.sample(all_tags_list, sample_size)
-                        selected_tag_ids = [tag[0] for tag in selected_tags]
-                        selected_tag_names = [tag[1] for tag in selected_tags]
 
-                        # 5. Prepare SQL Insert Data
-                        sql_insert_data = [
-                            {"thread_id": thread_id, "tag_id": tag_id}
-                            for tag_id in selected_tag_ids
-                        ]
+                        selected_tags = random.sample(all_tags_list, sample_size)
+                        sql_insert_data.extend({"thread_id": thread_id, "tag_id": tag_id} for tag_id, _ in selected_tags)
+                        thread_tags.append((thread_id, [tag_name for _, tag_name in selected_tags]))
 
-                        # 6. Execute SQL Insert (handle conflicts)
+                    if not thread_tags:
+                        continue
+                    try:
+                        # 5. Execute SQL Insert (handle conflicts)
                         sql_stmt = insert(ThreadTag).values(sql_insert_data)
                         sql_stmt = sql_stmt.on_conflict_do_nothing(
-                            index_elements=['thread_id', 'tag_id'] 
+                            index_elements=['thread_id', 'tag_id']
                         )
                         session.execute(sql_stmt)
 
-                        # 7. Add tags to Neo4j using the data access function
-                        neo4j_da.add_tags_to_thread(
-                            thread_id=thread_id,
-                            tags=selected_tag_names, 
-                            neo4j_session=neo4j_session # Pass the synchronous session
-                        )
+                        # 6. Add tags to Neo4j in one batched write
+                        neo4j_da.add_tags_to_threads(thread_tags, neo4j_session=neo4j_session)
 
-                        # 8. Commit SQL transaction AFTER successful Neo4j operation
+                        # 7. Commit SQL transaction AFTER successful Neo4j operation
                         session.commit()
-                        processed_threads += 1
-                        if processed_threads % 100 == 0: 
-                           print(f"Processed {processed_threads}/{len(all_thread_ids)} threads...")
+                        processed_threads += len(thread_tags)
+                        elapsed = time.perf_counter() - started
+                        print(f"Processed {processed_threads}/{len(all_thread_ids)} threads ({processed_threads / elapsed:.1f} threads/s)...")
 
                     except Exception as e:
-                        print(f"Error processing thread ID {thread_id}: {e}")
-                        session.rollback() 
-                        # continue # Uncomment if you want to continue despite errors
+                        print(f"Error processing threads {chunk[0]}..{chunk[-1]}: {e}")
+                        session.rollback()
 
         except Exception as e:
             print(f"An error occurred during the main process: {e}")
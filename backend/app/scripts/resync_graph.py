@@ -0,0 +1,63 @@
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path to allow imports from app
+project_root = Path(__file__).parent.parent.parent.absolute()
+sys.path.append(str(project_root))
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.db import engine as sql_engine
+from app.core.neo4j import neo4j_conn
+from app.data_access import neo4j as neo4j_da
+
+# Must be an auto-commit query: CALL {} IN TRANSACTIONS can't run inside an explicit transaction
+DELETE_HAS_TAG_QUERY = """
+    MATCH (:Thread)-[r:HAS_TAG]->(:Tag)
+    CALL { WITH r DELETE r } IN TRANSACTIONS OF 10000 ROWS
+"""
+
+THREAD_TAGS_QUERY = """
+    SELECT threadtag.thread_id, array_agg(tag.name)
+    FROM threadtag
+    JOIN tag ON tag.id = threadtag.tag_id
+    GROUP BY threadtag.thread_id
+    ORDER BY threadtag.thread_id
+"""
+
+
+def main():
+    """
+    Rebuild every HAS_TAG relationship in Neo4j from the threadtag table, for when the graph
+    has drifted from Postgres (e.g. the outbox was truncated). Outbox rows drained while this
+    runs are harmless: the graph writes are idempotent MERGEs.
+    """
+    print("Resyncing Neo4j thread tags from Postgres...")
+    neo4j_conn.driver.verify_connectivity()
+
+    with neo4j_conn.driver.session() as neo4j_session:
+        print("Deleting existing HAS_TAG relationships...")
+        summary = neo4j_session.run(DELETE_HAS_TAG_QUERY).consume()
+        print(f"Deleted {summary.counters.relationships_deleted} relationships.")
+
+        started = time.perf_counter()
+        synced = 0
+        with Session(sql_engine) as session:
+            # Server-side cursor, so the whole table is never held in memory
+            rows = session.execute(
+                text(THREAD_TAGS_QUERY).execution_options(yield_per=neo4j_da.TAG_BATCH_SIZE)
+            )
+            for chunk in rows.partitions():
+                neo4j_da.add_tags_to_threads([(thread_id, names) for thread_id, names in chunk], neo4j_session=neo4j_session)
+                synced += len(chunk)
+                elapsed = time.perf_counter() - started
+                print(f"Synced {synced} threads ({synced / elapsed:.1f} threads/s)")
+
+    neo4j_conn.close()
+    print("Resync finished.")
+
+
+if __name__ == "__main__":
+    main()
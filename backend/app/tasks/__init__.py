@@ -1,6 +1,14 @@
 from app.tasks.thread import record_thread_view, process_thread_views
+from app.tasks.counter import fold_counter_deltas
+from app.tasks.reaction import flush_pending_reactions
+from app.tasks.similar import recompute_similar_threads
+from app.tasks.outbox import drain_graph_outbox
 
 __all__ = [
   "record_thread_view",
   "process_thread_views",
-]
\ No newline at end of file
+  "fold_counter_deltas",
+  "flush_pending_reactions",
+  "recompute_similar_threads",
+  "drain_graph_outbox",
+]
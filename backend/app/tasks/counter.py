@@ -0,0 +1,20 @@
+from sqlmodel import Session
+
+from app.worker import celery
+from app.core.db import engine
+from app.data_access import counter
+
+
+@celery.task
+def fold_counter_deltas():
+  """Fold queued thread/category counter deltas into their parent rows in batches"""
+  total = 0
+  with Session(engine) as session:
+    while True:
+      folded = counter.fold_pending_deltas(session)
+      total += folded
+      # A short batch means the queue is drained (or the rest is locked by another fold)
+      if folded < counter.FOLD_BATCH_SIZE:
+        break
+
+  return f"Folded {total} counter deltas"
@@ -0,0 +1,38 @@
+import logging
+
+from sqlmodel import Session
+
+from app.worker import celery
+from app.core.config import settings
+from app.core.db import engine
+from app.core.neo4j import neo4j_conn
+from app.data_access import outbox
+from app.tasks.similar import recompute_similar_threads
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task
+def drain_graph_outbox():
+  """Apply queued thread tag changes to Neo4j in batches"""
+  total = 0
+  applied: dict[int, set[str]] = {}
+  with Session(engine) as session, neo4j_conn.driver.session() as neo4j_session:
+    while True:
+      drained, thread_tags = outbox.drain_outbox(session, neo4j_session)
+      total += drained
+      for thread_id, tag_names in thread_tags.items():
+        applied.setdefault(thread_id, set()).update(tag_names)
+      # A short batch means the outbox is drained (or the rest is locked by another drain)
+      if drained < outbox.DRAIN_BATCH_SIZE:
+        break
+    lag = outbox.get_outbox_lag(session)
+
+    # The graph only has the new HAS_TAG edges now, recomputing any earlier caches stale lists
+    if applied and settings.SIMILAR_THREADS_BACKEND == "neo4j":
+      for thread_id, tag_ids in outbox.get_tag_ids(session, applied).items():
+        recompute_similar_threads.delay(thread_id, tag_ids)
+
+  if lag["pending"]:
+    logger.info(f"Graph outbox lag: {lag['pending']} rows, oldest {lag['oldest_age_seconds']:.1f}s")
+  return f"Applied {total} graph outbox rows"
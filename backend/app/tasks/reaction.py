@@ -0,0 +1,85 @@
+import logging
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+from redis.exceptions import ResponseError
+
+from app.core.redis import RedisConnection
+from app.worker import celery
+from app.core.db import engine
+from app.data_access import reaction
+
+logger = logging.getLogger(__name__)
+
+FLUSH_CHUNK_SIZE = 1000
+# A chunk still failing on this attempt is set aside, so it can't block every later flush
+MAX_FLUSH_ATTEMPTS = 3
+
+
+@celery.task
+def flush_pending_reactions():
+  """Persist the reaction toggles buffered in Redis to postreaction and post_reaction_count in batches"""
+  import asyncio
+
+  async def async_flush():
+    task_redis = RedisConnection()
+    await task_redis.connect()
+    client = task_redis.get_client()
+    try:
+      # A leftover processing hash means the previous flush failed, so retry it before taking new changes.
+      # Otherwise move the pending hash aside atomically; toggles keep landing in a fresh one meanwhile.
+      if not await client.exists(reaction.REACTION_PENDING_PROCESSING_KEY):
+        try:
+          await client.rename(reaction.REACTION_PENDING_KEY, reaction.REACTION_PENDING_PROCESSING_KEY)
+        except ResponseError:
+          return "No reactions to flush"
+        await client.delete(reaction.REACTION_FLUSH_ATTEMPTS_KEY)
+      attempt = await client.incr(reaction.REACTION_FLUSH_ATTEMPTS_KEY)
+      pending = await client.hgetall(reaction.REACTION_PENDING_PROCESSING_KEY)
+
+      added, removed = [], []
+      for field, reacted in pending.items():
+        post_id, reaction_type, user_id = (int(part) for part in field.split(":"))
+        change = (field, (post_id, user_id, reaction_type))
+        (added if reacted == "1" else removed).append(change)
+
+      # Re-applying a chunk after a failure is harmless: inserts/deletes only count rows they changed
+      flushed, retried, quarantined = 0, 0, 0
+      with Session(engine) as session:
+        for start in range(0, max(len(added), len(removed)), FLUSH_CHUNK_SIZE):
+          added_chunk = added[start:start + FLUSH_CHUNK_SIZE]
+          removed_chunk = removed[start:start + FLUSH_CHUNK_SIZE]
+          fields = [field for field, _ in added_chunk + removed_chunk]
+          try:
+            reaction.apply_reaction_changes(
+              session,
+              [change for _, change in added_chunk],
+              [change for _, change in removed_chunk],
+            )
+            session.commit()
+            flushed += len(fields)
+          except SQLAlchemyError as e:
+            session.rollback()
+            if attempt < MAX_FLUSH_ATTEMPTS:
+              logger.warning(f"Flushing {len(fields)} reaction changes failed (attempt {attempt}), retrying later: {e}")
+              retried += len(fields)
+              continue
+            logger.error(f"Setting aside {len(fields)} reaction changes after {attempt} failed attempts: {e}")
+            await client.hset(reaction.REACTION_PENDING_FAILED_KEY, mapping={field: pending[field] for field in fields})
+            quarantined += len(fields)
+          # Only the chunks that still fail are left for the next run
+          await client.hdel(reaction.REACTION_PENDING_PROCESSING_KEY, *fields)
+
+      if not retried:
+        await client.delete(reaction.REACTION_PENDING_PROCESSING_KEY, reaction.REACTION_FLUSH_ATTEMPTS_KEY)
+      return f"Flushed {flushed} reaction changes, {retried} left for retry, {quarantined} set aside"
+    finally:
+      await task_redis.close()
+
+  # Run the async function in a new event loop
+  loop = asyncio.new_event_loop()
+  asyncio.set_event_loop(loop)
+  try:
+    return loop.run_until_complete(async_flush())
+  finally:
+    loop.close()
@@ -0,0 +1,35 @@
+from sqlmodel import Session
+
+from app.core.redis import RedisConnection
+from app.worker import celery
+from app.core.db import engine
+from app.data_access import similar
+
+
+@celery.task
+def recompute_similar_threads(thread_id: int, tag_ids: list[int] | None = None):
+  """Rebuild the cached similar-thread lists of the threads sharing one of tag_ids (all tags of thread_id when omitted)"""
+  import asyncio
+
+  async def async_recompute():
+    task_redis = RedisConnection()
+    await task_redis.connect()
+    try:
+      # Patch this worker's tag index with the new tags before scoring
+      similar.tag_index.add_thread_tags(thread_id, tag_ids or [])
+      with Session(engine) as session:
+        affected = similar.get_affected_threads(session, thread_id, tag_ids)
+        for start in range(0, len(affected), similar.RECOMPUTE_CHUNK_SIZE):
+          computed = similar.compute_similar_threads(session, affected[start:start + similar.RECOMPUTE_CHUNK_SIZE])
+          await similar.cache_similar_threads(computed, redis=task_redis)
+      return f"Recomputed similar threads of {len(affected)} threads"
+    finally:
+      await task_redis.close()
+
+  # Run the async function in a new event loop
+  loop = asyncio.new_event_loop()
+  asyncio.set_event_loop(loop)
+  try:
+    return loop.run_until_complete(async_recompute())
+  finally:
+    loop.close()
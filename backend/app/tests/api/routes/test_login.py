@@ -0,0 +1,45 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.security import UNUSABLE_PASSWORD_HASH
+from app.models.user import UserCreate
+from app.tests.utils.utils import random_lower_string
+from app.utils import generate_password_reset_token
+
+
+def test_imported_user_sets_password_through_reset(client: TestClient, db: Session) -> None:
+    email = f"{random_lower_string()}@example.com"
+    user_create = UserCreate(email=email, password=random_lower_string(), user_name="imported")
+    crud.create_user(session=db, user_create=user_create, hashed_password=UNUSABLE_PASSWORD_HASH)
+
+    # Indistinguishable from a wrong password
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": email, "password": random_lower_string()},
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Incorrect email or password"
+
+    new_password = random_lower_string()
+    r = client.post(
+        f"{settings.API_V1_STR}/reset-password/",
+        json={"token": generate_password_reset_token(email=email), "new_password": new_password},
+    )
+    assert r.status_code == 200
+
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": email, "password": new_password},
+    )
+    assert r.status_code == 200
+    assert "access_token" in r.json()
+
+
+def test_reset_password_invalid_token(client: TestClient) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/reset-password/",
+        json={"token": "invalid", "new_password": random_lower_string()},
+    )
+    assert r.status_code == 400
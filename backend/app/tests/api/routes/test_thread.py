@@ -0,0 +1,65 @@
+import pytest
+from fastapi.testclient import TestClient
+from neo4j.exceptions import ServiceUnavailable
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.data_access import reaction, similar
+from app.models.post import Post, PostReaction, PostReactionCount
+from app.models.thread import Thread
+from app.tests.utils.thread import create_thread_with_post, get_superuser
+
+
+def test_delete_thread_with_reacted_posts(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    thread, post = create_thread_with_post(db)
+    user = get_superuser(db)
+    # One reaction persisted with its aggregate row, one only toggled into Redis
+    reaction.add_reaction(db, post.id, user.id, 0)
+    db.commit()
+    r = client.post(
+        f"{settings.API_V1_STR}/thread/posts/{post.id}/reaction",
+        headers=superuser_token_headers,
+        params={"reaction_type": 1},
+    )
+    assert r.status_code == 200
+    thread_id, post_id = thread.id, post.id
+
+    r = client.delete(f"{settings.API_V1_STR}/thread/{thread_id}", headers=superuser_token_headers)
+    assert r.status_code == 200
+
+    db.expire_all()
+    assert db.get(Thread, thread_id) is None
+    assert db.get(Post, post_id) is None
+    assert db.exec(select(PostReaction).where(PostReaction.post_id == post_id)).first() is None
+    assert db.exec(select(PostReactionCount).where(PostReactionCount.post_id == post_id)).first() is None
+    r = client.get(f"{settings.API_V1_STR}/thread/posts/reactions", params={"post_ids": [post_id]})
+    assert r.json() == {str(post_id): {}}
+
+
+def test_delete_missing_thread(client: TestClient, superuser_token_headers: dict[str, str]) -> None:
+    r = client.delete(f"{settings.API_V1_STR}/thread/0", headers=superuser_token_headers)
+    assert r.status_code == 404
+
+
+def test_thread_page_without_similar_threads_backend(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    thread, post = create_thread_with_post(db)
+
+    async def compute_similar_threads_async(bind, thread_ids, k=similar.SIMILAR_THREADS_K):
+        raise ServiceUnavailable("neo4j is down")
+
+    monkeypatch.setattr(similar, "compute_similar_threads_async", compute_similar_threads_async)
+
+    r = client.get(f"{settings.API_V1_STR}/thread/{thread.id}/page")
+    assert r.status_code == 200
+    assert r.json()["similar_threads"] == []
+    assert [p["id"] for p in r.json()["posts"]] == [post.id]
+    r = client.get(f"{settings.API_V1_STR}/thread/similar_threads", params={"thread_id": thread.id})
+    assert r.status_code == 200
+    assert r.json() == []
+    r = client.get(f"{settings.API_V1_STR}/thread/similar_threads/batch", params={"thread_ids": [thread.id]})
+    assert r.status_code == 200
+    assert r.json() == {str(thread.id): []}
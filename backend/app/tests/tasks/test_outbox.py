@@ -0,0 +1,52 @@
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.data_access import neo4j
+from app.models.thread import Tag
+from app.tasks import outbox as outbox_task
+from app.tasks.outbox import drain_graph_outbox
+from app.tasks.similar import recompute_similar_threads
+from app.tests.utils.thread import create_thread_with_post
+from app.tests.utils.utils import random_lower_string
+
+
+def test_neo4j_recompute_waits_for_graph_write(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    events = []
+
+    def add_tags_to_threads(thread_tags, *, neo4j_session):
+        events.extend(("graph", thread_id) for thread_id, _ in thread_tags)
+        return len(thread_tags)
+
+    monkeypatch.setattr(settings, "SIMILAR_THREADS_BACKEND", "neo4j")
+    monkeypatch.setattr(neo4j, "add_tags_to_threads", add_tags_to_threads)
+    monkeypatch.setattr(outbox_task, "neo4j_conn", SimpleNamespace(driver=SimpleNamespace(session=nullcontext)))
+    monkeypatch.setattr(
+        recompute_similar_threads, "delay", lambda thread_id, tag_ids: events.append(("recompute", thread_id, tag_ids))
+    )
+    thread, _ = create_thread_with_post(db)
+    tag = Tag(name=random_lower_string())
+    db.add(tag)
+    db.commit()
+    thread_id, tag_id = thread.id, tag.id
+
+    r = client.post(
+        f"{settings.API_V1_STR}/tag/thread",
+        headers=superuser_token_headers,
+        params={"thread_id": thread_id},
+        json=[tag_id],
+    )
+    assert r.status_code == 200
+    # Until the outbox is drained the graph doesn't have the new edge
+    assert events == []
+
+    drain_graph_outbox()
+
+    thread_events = [event for event in events if event[1] == thread_id]
+    assert thread_events == [("graph", thread_id), ("recompute", thread_id, [tag_id])]
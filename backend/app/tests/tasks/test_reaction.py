@@ -0,0 +1,56 @@
+from collections.abc import Generator
+
+import pytest
+from redis import Redis
+from sqlmodel import Session, func, select
+
+from app.core.config import settings
+from app.data_access import reaction
+from app.models.post import Post, PostReaction
+from app.tasks.reaction import flush_pending_reactions
+from app.tests.utils.thread import create_thread_with_post, get_superuser
+
+
+@pytest.fixture()
+def redis_client() -> Generator[Redis, None, None]:
+    client = Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        password=settings.REDIS_PASSWORD,
+        decode_responses=True,
+    )
+    yield client
+    client.close()
+
+
+def test_flush_drops_toggle_on_missing_post(db: Session, redis_client: Redis) -> None:
+    _, post = create_thread_with_post(db)
+    user = get_superuser(db)
+    missing_post_id = db.exec(select(func.max(Post.id))).one() + 1000
+    redis_client.hset(
+        reaction.REACTION_PENDING_KEY,
+        mapping={
+            f"{missing_post_id}:0:{user.id}": "1",
+            f"{post.id}:0:{user.id}": "1",
+        },
+    )
+
+    flush_pending_reactions()
+
+    # The toggle on the existing post is persisted and the batch isn't left behind for retry
+    assert not redis_client.exists(reaction.REACTION_PENDING_PROCESSING_KEY)
+    db.expire_all()
+    persisted = db.exec(select(PostReaction.post_id).where(PostReaction.user_id == user.id)).all()
+    assert post.id in persisted
+    assert missing_post_id not in persisted
+
+    # Later toggles are picked up again
+    redis_client.hset(reaction.REACTION_PENDING_KEY, f"{post.id}:1:{user.id}", "1")
+    flush_pending_reactions()
+    assert not redis_client.exists(reaction.REACTION_PENDING_KEY)
+    db.expire_all()
+    reaction_types = db.exec(
+        select(PostReaction.reaction_type).where(PostReaction.post_id == post.id, PostReaction.user_id == user.id)
+    ).all()
+    assert sorted(reaction_types) == [0, 1]
@@ -0,0 +1,39 @@
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.data_access import thread as thread_da
+from app.models.category import Category
+from app.models.post import Post
+from app.models.thread import Thread, ThreadCreate
+from app.models.user import User
+from app.tests.utils.utils import random_lower_string
+
+
+def get_superuser(db: Session) -> User:
+    return db.exec(select(User).where(User.email == settings.FIRST_SUPERUSER)).one()
+
+
+def get_thread_category(db: Session) -> Category:
+    """A second level category, the only level threads can be created in; made under the root if missing."""
+    category = db.exec(select(Category).where(Category.level == 2)).first()
+    if category is not None:
+        return category
+    user = get_superuser(db)
+    root = db.exec(select(Category).where(Category.level == 0)).first()
+    parent = Category(title=random_lower_string(), level=1, user_id=user.id, parent_id=root.id)
+    db.add(parent)
+    db.flush()
+    category = Category(title=random_lower_string(), level=2, user_id=user.id, parent_id=parent.id)
+    db.add(category)
+    db.commit()
+    db.refresh(category)
+    return category
+
+
+def create_thread_with_post(db: Session) -> tuple[Thread, Post]:
+    """A thread with one post by the superuser, written by the same path as the API."""
+    user = get_superuser(db)
+    category = get_thread_category(db)
+    thread_in = ThreadCreate(title=random_lower_string(), category_id=category.id, content=random_lower_string())
+    created_thread, first_post = thread_da.create_thread(db, thread_in, user.id)
+    return db.get(Thread, created_thread.id), db.get(Post, first_post.id)
@@ -15,6 +15,18 @@ celery.conf.beat_schedule = {
         'task': 'app.tasks.thread.refresh_trending_view',
         'schedule': 3600.0,  # Refresh every hour
     },
+    'fold-counter-deltas': {
+        'task': 'app.tasks.counter.fold_counter_deltas',
+        'schedule': 5.0,  # Listing counters lag by at most a few seconds
+    },
+    'flush-pending-reactions': {
+        'task': 'app.tasks.reaction.flush_pending_reactions',
+        'schedule': 5.0,  # Redis serves live counts, Postgres catches up every few seconds
+    },
+    'drain-graph-outbox': {
+        'task': 'app.tasks.outbox.drain_graph_outbox',
+        'schedule': 2.0,  # Neo4j trails Postgres tag changes by a few seconds
+    },
 }
 
 # Optional: Configure other Celery settings